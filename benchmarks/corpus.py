@@ -0,0 +1,140 @@
+"""
+Deterministic generator of the synthetic wiki corpus used for benchmarking.
+For the same arguments and seed, exactly the same wiki is generated, so
+results of the benchmarks run on different revisions can be compared.
+"""
+import os
+import random
+
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing',
+         'elit', 'sed', 'do', 'eiusmod', 'tempor', 'incididunt', 'ut',
+         'labore', 'et', 'dolore', 'magna', 'aliqua', 'enim', 'ad', 'minim',
+         'veniam', 'quis', 'nostrud', 'exercitation', 'ullamco', 'laboris',
+         'nisi', 'aliquip', 'ex', 'ea', 'commodo', 'consequat', 'duis', 'aute',
+         'irure', 'in', 'reprehenderit', 'voluptate', 'velit', 'esse',
+         'cillum', 'fugiat', 'nulla', 'pariatur']
+MARKUP = ('*{}*', '_{}_', '~~{}~~', '`{}`', '^{}^', ',,{},,')
+LEXERS = ('python', 'c', 'bash', 'type=js', '')
+KINDS = ('header', 'paragraph', 'list', 'table', 'code', 'links')
+# probabilities of the word with inline markup, ordered list and the table
+# cell spanning the previous column
+MARKUP_RATIO = 0.1
+ORDERED_RATIO = 0.3
+COLSPAN_RATIO = 0.1
+
+
+class PageGenerator:
+    """
+    Generate wiki pages contents out of random blocks of the selected kinds.
+    Links are pointing to the names provided by pages.
+    """
+    lexers = LEXERS
+
+    def __init__(self, seed=0, pages=()):
+        self.rng = random.Random(seed)  # noqa: S311
+        self.pages = list(pages) or ['index']
+
+    def _words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def _text(self, count):
+        words = []
+        for _ in range(count):
+            word = self.rng.choice(WORDS)
+            if self.rng.random() < MARKUP_RATIO:
+                word = self.rng.choice(MARKUP).format(word)
+            words.append(word)
+        return ' '.join(words)
+
+    def block_header(self):
+        level = self.rng.randint(1, 4)
+        marks = '=' * level
+        return f'{marks} {self._words(3).capitalize()} {marks}\n'
+
+    def block_paragraph(self):
+        lines = [self._text(12) for _ in range(self.rng.randint(1, 5))]
+        return '\n'.join(lines) + '\n'
+
+    def block_list(self):
+        lines = []
+        indent = 0
+        ordered = self.rng.random() < ORDERED_RATIO
+        for _ in range(self.rng.randint(2, 10)):
+            indent = max(0, min(indent + self.rng.randint(-1, 1), 3))
+            bullet = '1.' if ordered else self.rng.choice('*-')
+            check = self.rng.choice(('', '', '[ ] ', '[X] '))
+            lines.append(f'{"  " * indent}{bullet} {check}{self._text(8)}')
+        return '\n'.join(lines) + '\n'
+
+    def block_table(self):
+        columns = self.rng.randint(2, 6)
+        lines = ['| ' + ' | '.join(self._words(2) for _ in range(columns)) +
+                 ' |',
+                 '|' + '|'.join('---' for _ in range(columns)) + '|']
+        for _ in range(self.rng.randint(2, 12)):
+            cells = [self._text(3) for _ in range(columns)]
+            if self.rng.random() < COLSPAN_RATIO:
+                cells[-1] = '>'
+            lines.append('| ' + ' | '.join(cells) + ' |')
+        return '\n'.join(lines) + '\n'
+
+    def block_code(self):
+        lines = [f'{{{{{{{self.rng.choice(self.lexers)}']
+        indent = 0
+        for _ in range(self.rng.randint(3, 15)):
+            indent = max(0, min(indent + self.rng.randint(-1, 1), 3))
+            lines.append('    ' * indent + self._words(5) + ' = 1')
+        lines.append('}}}')
+        return '\n'.join(lines) + '\n'
+
+    def block_links(self):
+        items = []
+        for _ in range(self.rng.randint(1, 5)):
+            target = self.rng.choice(self.pages)
+            match self.rng.randint(0, 3):
+                case 0:
+                    items.append(f'[[/{target}]]')
+                case 1:
+                    items.append(f'[[/{target}|{self._words(2)}]]')
+                case 2:
+                    items.append(f'https://example.com/{self._words(1)}')
+                case _:
+                    items.append(f'[[https://example.com|{self._words(2)}]]')
+        return self._text(5) + ' ' + ' '.join(items) + '\n'
+
+    def page(self, blocks=20, kinds=KINDS):
+        """
+        Return page contents with provided number of the blocks, randomly
+        selected from the kinds.
+        """
+        contents = [f'%title {self._words(3)}\n', self.block_header()]
+        for _ in range(blocks):
+            block = getattr(self, 'block_' + self.rng.choice(kinds))
+            contents.append(block())
+        return '\n'.join(contents)
+
+
+def generate_wiki(path, pages=100, depth=2, blocks=20, seed=0):
+    """
+    Create wiki with provided number of pages in the path. Pages are spread
+    over directories nested up to depth levels. Number of blocks for every
+    page is randomly selected between 1 and twice the blocks, so the page
+    sizes vary. Return total size of the wiki files in bytes.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    names = ['index']
+    for num in range(1, pages):
+        dirs = [f'dir{rng.randint(0, 3)}'
+                for _ in range(rng.randint(0, depth))]
+        names.append('/'.join([*dirs, f'page{num}']))
+
+    generator = PageGenerator(seed, names)
+    size = 0
+    for name in names:
+        fname = os.path.join(path, name + '.wiki')
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        contents = generator.page(rng.randint(1, blocks * 2))
+        with open(fname, 'w') as fobj:
+            fobj.write(contents)
+        size += len(contents.encode())
+    return size
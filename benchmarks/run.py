@@ -0,0 +1,186 @@
+"""
+Run the benchmarks on the generated wiki and write results as JSON:
+
+    python -m benchmarks.run --pages 1000 --output result.json
+
+Results of the two runs (i.e. on different revisions) can be compared using
+--compare option, which will show relative change for every measure.
+Benchmark consists of two parts - end to end build of the whole wiki with
+VimWiki2HTMLConverter, the same way vw2html command does it, and converting
+every page with VimWiki2Html.convert in the current process, without
+applying template and writing the output.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import vw2html
+import vw2html.cli
+import vw2html.executor
+import vw2html.html
+from benchmarks import corpus
+
+LOG = logging.getLogger()
+
+
+def _throughput(duration, pages, size):
+    return {'time': round(duration, 6),
+            'pages_per_s': round(pages / duration, 2) if duration else None,
+            'mb_per_s': (round(size / duration / 2**20, 3) if duration
+                         else None)}
+
+
+def _peak_rss():
+    """
+    Return peak resident set size in kilobytes of the current process, and
+    the largest one of its finished children (pool workers).
+    """
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    factor = 1024 if sys.platform == 'darwin' else 1
+    return {'self_kb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss //
+                        factor),
+            'children_kb': (resource.getrusage(resource.RUSAGE_CHILDREN)
+                            .ru_maxrss // factor)}
+
+
+def bench_build(path, jobs=0, executor='auto'):
+    """
+    Convert whole wiki from the scratch, return the time it took.
+    """
+    output = path + '_html'
+    shutil.rmtree(output, ignore_errors=True)
+    args = argparse.Namespace(root=path, template=None, stylesheet=None,
+                              source=path, output=output, config='',
+                              force=True, jobs=jobs, executor=executor,
+                              page_timeout=None, slowest=None, profile=None,
+                              asset_mode=None)
+    start = time.perf_counter()
+    converter = vw2html.cli.VimWiki2HTMLConverter(args)
+    converter.progress = False
+    converter.convert()
+    return time.perf_counter() - start
+
+
+def bench_pages(path, repeat=1):
+    """
+    Convert every page in the current process, return total time (best of
+    repeat runs) and the conversion times of the every page.
+    """
+    args = argparse.Namespace(root=path, template=None, stylesheet=None,
+                              source=path, output=tempfile.mkdtemp(),
+                              config='', force=True, jobs=1, executor=None,
+                              page_timeout=None, slowest=None, profile=None,
+                              asset_mode=None)
+    converter = vw2html.cli.VimWiki2HTMLConverter(args)
+    times = {}
+    for fname in converter.scan_for_wiki_files():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            vw2html.html.VimWiki2Html(fname, converter).convert()
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        times[os.path.relpath(fname, path)] = best
+    shutil.rmtree(args.output)
+    return sum(times.values()), times
+
+
+def run(args):
+    path = os.path.join(tempfile.mkdtemp(), 'wiki')
+    try:
+        size = corpus.generate_wiki(path, args.pages, args.depth, args.blocks,
+                                    args.seed)
+        build = min(bench_build(path, args.jobs, args.executor)
+                    for _ in range(args.repeat))
+        pages_time, times = bench_pages(path, args.repeat)
+    finally:
+        shutil.rmtree(os.path.dirname(path))
+
+    slowest = sorted(times.items(), key=lambda x: -x[1])[:10]
+    return {'version': vw2html.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus': {'pages': args.pages, 'depth': args.depth,
+                       'blocks': args.blocks, 'seed': args.seed,
+                       'bytes': size},
+            'build': {**_throughput(build, args.pages, size),
+                      'jobs': args.jobs, 'executor': args.executor},
+            'pages': {**_throughput(pages_time, args.pages, size),
+                      'slowest': {k: round(v, 6) for k, v in slowest}},
+            'peak_rss': _peak_rss()}
+
+
+def compare(old, new):
+    """
+    Show relative change of the measures between two results.
+    """
+    if old['corpus'] != new['corpus']:
+        LOG.warning("Results are for different corpora, comparison is not "
+                    "meaningful")
+    for section in ('build', 'pages'):
+        for key in ('time', 'pages_per_s', 'mb_per_s'):
+            before, after = old[section][key], new[section][key]
+            change = (after - before) / before * 100 if before else 0
+            sys.stdout.write(f"{section + '.' + key:20} {before:12.3f} "
+                             f"{after:12.3f} {change:+8.1f}%\n")
+    for key in ('self_kb', 'children_kb'):
+        before, after = old['peak_rss'][key], new['peak_rss'][key]
+        change = (after - before) / before * 100 if before else 0
+        sys.stdout.write(f"{'peak_rss.' + key:20} {before:12} {after:12} "
+                         f"{change:+8.1f}%\n")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark vw2html "
+                                     "conversion on a generated wiki")
+    parser.add_argument('-n', '--pages', type=int, default=500,
+                        help="Number of pages to generate, default 500")
+    parser.add_argument('-d', '--depth', type=int, default=2,
+                        help="Maximum directory nesting, default 2")
+    parser.add_argument('-b', '--blocks', type=int, default=20,
+                        help="Average number of blocks (headers, lists, "
+                        "tables, etc) per page, default 20")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="Seed for the generator, default 0")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Number of runs, best one is taken, default 3")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="Number of jobs for the build, default number "
+                        "of CPUs")
+    parser.add_argument('-e', '--executor', default='auto',
+                        choices=vw2html.executor.EXECUTORS,
+                        help="Executor used for the build, default auto")
+    parser.add_argument('-o', '--output', help="Write results to the file "
+                        "instead of stdout")
+    parser.add_argument('-c', '--compare', metavar='FILE', help="Compare "
+                        "results with the ones stored in FILE")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.ERROR,
+                        format='%(levelname)s: %(message)s')
+    result = run(args)
+    if args.output:
+        with open(args.output, 'w') as fobj:
+            json.dump(result, fobj, indent=2)
+            fobj.write('\n')
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare) as fobj:
+            compare(json.load(fobj), result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Check that conversion time grows linearly with the size of the page. For
+every kind of the wiki block, page is generated with the small and four
+times bigger number of blocks, and time per byte of the bigger page may not
+exceed the time per byte of the smaller one more than tolerance times.
+
+Timings depend on the machine load, so the tests are run only if
+VW2HTML_BENCHMARKS environment variable is set.
+"""
+import gc
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from benchmarks import corpus
+from vw2html import html
+
+TOLERANCE = 2
+REPEAT = 5
+
+
+@unittest.skipUnless(os.environ.get('VW2HTML_BENCHMARKS'),
+                     'set VW2HTML_BENCHMARKS to run the scaling tests')
+class TestScaling(unittest.TestCase):
+
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._fname = os.path.join(self._path, 'page.wiki')
+        self._conf = mock.MagicMock(path=self._path,
+                                    path_html=self._path + '_html',
+                                    skip_toc_level=0)
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+        shutil.rmtree(self._path + '_html', ignore_errors=True)
+
+    def _time_per_byte(self, contents):
+        with open(self._fname, 'w') as fobj:
+            fobj.write(contents)
+        best = None
+        gc.disable()
+        try:
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                html.VimWiki2Html(self._fname, self._conf).convert()
+                duration = time.perf_counter() - start
+                best = duration if best is None else min(best, duration)
+        finally:
+            gc.enable()
+        return best / len(contents)
+
+    def assertLinear(self, kind, blocks=100, lexers=corpus.LEXERS):  # noqa: N802
+        generator = corpus.PageGenerator()
+        generator.lexers = lexers
+        small = self._time_per_byte(generator.page(blocks, (kind,)))
+        big = self._time_per_byte(generator.page(blocks * 4, (kind,)))
+        self.assertLess(big / small, TOLERANCE,
+                        f"Conversion of {kind} blocks grows super-linearly, "
+                        f"time per byte raised {big / small:.1f} times")
+
+    def test_headers(self):
+        self.assertLinear('header', 1000)
+
+    def test_paragraphs(self):
+        self.assertLinear('paragraph')
+
+    def test_lists(self):
+        self.assertLinear('list')
+
+    def test_tables(self):
+        self.assertLinear('table')
+
+    def test_links(self):
+        self.assertLinear('links', 200)
+
+    def test_code(self):
+        # without highlighting, which time is linear, but it hides the
+        # separation cost for the small pages
+        self.assertLinear('code', 250, ('',))
+
+    def test_link_dense_line(self):
+        def line(count):
+            return ' '.join(f'[[page{x}]] `code{x}` https://example.com/{x}'
+                            for x in range(count))
+
+        small = self._time_per_byte(line(500))
+        big = self._time_per_byte(line(2000))
+        self.assertLess(big / small, TOLERANCE)
+
+    def test_merged_table_column(self):
+        def table(rows):
+            return '| a | b |\n' + ''.join(f'| \\/ | {x} |\n'
+                                           for x in range(rows))
+
+        small = self._time_per_byte(table(1000))
+        big = self._time_per_byte(table(4000))
+        self.assertLess(big / small, TOLERANCE)
+
+    def test_long_definition(self):
+        def definition(lines):
+            return 'term:: definition\n' + ''.join(f'       line {x}\n'
+                                                  for x in range(lines))
+
+        small = self._time_per_byte(definition(1000))
+        big = self._time_per_byte(definition(4000))
+        self.assertLess(big / small, TOLERANCE)
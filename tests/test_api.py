@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+import vw2html
+
+
+class TestRender(unittest.TestCase):
+
+    def test_render(self):
+        src = ('%title Foo\n'
+               '%template bar\n'
+               '%date 2020-01-01\n'
+               '= Baz =\n'
+               '[[page|Page]] {{local:img/a.png}} https://example.com\n')
+        result = vw2html.render(src)
+
+        self.assertEqual(result.html,
+                         '\n\n\n\n\n\n'
+                         '<h1 id="Baz"><a href="#Baz">Baz</a></h1>\n\n'
+                         '<p>\n<a href="page.html">Page</a> '
+                         '<img src="img/a.png"/> '
+                         '<a href="https://example.com">https://example.com'
+                         '</a>\n</p>')
+        self.assertEqual(result.title, 'Foo')
+        self.assertEqual(result.template, 'bar')
+        self.assertEqual(result.date, '2020-01-01')
+        self.assertFalse(result.nohtml)
+        self.assertEqual(result.links, ['page', 'https://example.com'])
+        self.assertEqual(result.images, ['local:img/a.png'])
+        self.assertEqual(result.assets, ['img/a.png'])
+
+    def test_without_placeholders(self):
+        result = vw2html.render('foo')
+        self.assertEqual(result.html, '<p>\nfoo\n</p>')
+        self.assertIsNone(result.title)
+        self.assertIsNone(result.template)
+        self.assertIsNone(result.date)
+
+    def test_nohtml(self):
+        result = vw2html.render('%nohtml\nfoo')
+        self.assertTrue(result.nohtml)
+        self.assertEqual(result.html, '')
+        self.assertIsNone(result.document)
+
+    def test_no_io(self):
+        src = '[[file:doc.pdf]] {{local:img/a.png}} {{img/b.png}}'
+        with (mock.patch('builtins.open', side_effect=AssertionError),
+              mock.patch('os.makedirs', side_effect=AssertionError),
+              mock.patch('os.path.exists', side_effect=AssertionError),
+              mock.patch('shutil.copy', side_effect=AssertionError)):
+            result = vw2html.render(src)
+        self.assertEqual(sorted(result.assets),
+                         ['doc.pdf', 'img/a.png', 'img/b.png'])
+
+    def test_options(self):
+        src = '%toc\n= foo =\n== bar ==\n'
+        result = vw2html.render(src, vw2html.Options(skip_toc_level=1))
+        self.assertIn('<a href="#bar">bar</a></li>', result.html)
+        self.assertNotIn('<a href="#foo">foo</a></li>', result.html)
+
+    def test_unknown_option(self):
+        self.assertRaises(TypeError, vw2html.Options, foo=1)
+
+    def test_render_many(self):
+        results = vw2html.render_many(['%title foo', 'bar'])
+        self.assertEqual([x.title for x in results], ['foo', None])
@@ -0,0 +1,134 @@
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from vw2html import assets
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self._source_dir = tempfile.mkdtemp()
+        self._output = tempfile.mkdtemp()
+        self._source = os.path.join(self._source_dir, 'logo.png')
+        self._dest = os.path.join(self._output, 'img', 'logo.png')
+        with open(self._source, 'w') as fobj:
+            fobj.write('logo')
+
+    def tearDown(self):
+        shutil.rmtree(self._output)
+        shutil.rmtree(self._source_dir)
+
+    def test_copy_once(self):
+        registry = assets.Registry()
+        for page in ('a.wiki', 'b.wiki', 'c.wiki'):
+            registry.add(self._source, self._dest, page)
+        self.assertEqual(len(registry), 1)
+        with mock.patch('vw2html.assets.copy', wraps=assets.copy) as copy:
+            self.assertEqual(registry.copy(), [])
+        copy.assert_called_once()
+        with open(self._dest) as fobj:
+            self.assertEqual(fobj.read(), 'logo')
+        self.assertEqual(len(registry), 0)
+
+    def test_skip_up_to_date(self):
+        registry = assets.Registry()
+        registry.add(self._source, self._dest)
+        registry.copy()
+        registry.add(self._source, self._dest)
+        with mock.patch('vw2html.assets.copy') as copy:
+            registry.copy()
+        copy.assert_not_called()
+
+    def test_same_contents_different_mtime(self):
+        os.makedirs(os.path.dirname(self._dest))
+        shutil.copy(self._source, self._dest)
+        os.utime(self._dest, ns=(0, 0))
+        self.assertTrue(assets.is_up_to_date(self._source, self._dest))
+        self.assertEqual(os.stat(self._dest).st_mtime_ns,
+                         os.stat(self._source).st_mtime_ns)
+
+    def test_changed(self):
+        os.makedirs(os.path.dirname(self._dest))
+        with open(self._dest, 'w') as fobj:
+            fobj.write('old!')
+        os.utime(self._dest, ns=(0, 0))
+        self.assertFalse(assets.is_up_to_date(self._source, self._dest))
+
+    def test_failed_owners(self):
+        registry = assets.Registry()
+        registry.add(os.path.join(self._source_dir, 'missing.png'),
+                     os.path.join(self._output, 'missing.png'), 'a.wiki')
+        registry.add(self._source, self._dest, 'b.wiki')
+        self.assertEqual(registry.copy(),
+                         [(os.path.join(self._output, 'missing.png'),
+                           'No such file or directory', {'a.wiki'})])
+        self.assertTrue(os.path.exists(self._dest))
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, assets.Registry, 'foo')
+
+    def test_hardlink(self):
+        registry = assets.Registry('hardlink')
+        registry.add(self._source, self._dest)
+        registry.copy()
+        self.assertTrue(os.path.samefile(self._source, self._dest))
+        self.assertFalse(os.path.islink(self._dest))
+
+    def test_symlink(self):
+        registry = assets.Registry('symlink')
+        registry.add(self._source, self._dest)
+        registry.copy()
+        self.assertEqual(os.readlink(self._dest), self._source)
+
+    def test_switch_mode(self):
+        registry = assets.Registry('symlink')
+        registry.add(self._source, self._dest)
+        registry.copy()
+        registry = assets.Registry('copy')
+        registry.add(self._source, self._dest)
+        registry.copy()
+        self.assertFalse(os.path.islink(self._dest))
+        self.assertFalse(os.path.samefile(self._source, self._dest))
+        with open(self._source) as fobj:
+            self.assertEqual(fobj.read(), 'logo')
+
+    @mock.patch('vw2html.assets.reflink')
+    def test_reflink_fallback(self, reflink):
+        reflink.side_effect = OSError(errno.EXDEV, 'Invalid cross-device '
+                                      'link')
+        registry = assets.Registry('auto')
+        registry.add(self._source, self._dest)
+        registry.add(self._source, self._dest + '.bak')
+        self.assertEqual(registry.copy(), [])
+        reflink.assert_called_once()
+        with open(self._dest) as fobj:
+            self.assertEqual(fobj.read(), 'logo')
+        # next build tries again
+        registry.add(self._source, self._dest + '.new')
+        registry.copy()
+        self.assertEqual(reflink.call_count, 2)
+
+
+    def test_threads(self):
+        registry = assets.Registry(jobs=2)
+        registry.add(self._source, self._dest, 'a.wiki')
+        registry._futures[self._dest].result()
+        self.assertTrue(os.path.exists(self._dest))
+        registry.add(self._source, self._dest, 'b.wiki')
+        registry.add(os.path.join(self._source_dir, 'missing.png'),
+                     os.path.join(self._output, 'missing.png'), 'c.wiki')
+        self.assertEqual(registry.copy(),
+                         [(os.path.join(self._output, 'missing.png'),
+                           'No such file or directory', {'c.wiki'})])
+
+    def test_threads_bounded(self):
+        registry = assets.Registry(jobs=2)
+        registry.pending_per_job = 1
+        for index in range(20):
+            registry.add(self._source, f'{self._dest}.{index}')
+        self.assertEqual(registry.copy(), [])
+        self.assertEqual(len(os.listdir(os.path.dirname(self._dest))), 20)
@@ -120,6 +120,14 @@ class TestTextAttrs(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_bold_with_only_underscore(self):
+        src = '*_* foo_'
+        exp = '<p>\n*<em>* foo</em>\n</p>'
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+
     def test_strikeout(self):
         src = '~~strikeout~~'
         exp = '<p>\n<del>strikeout</del>\n</p>'
@@ -1,6 +1,11 @@
 import argparse
+import io
+import json
 import os
+import pickle
+import shutil
 import tempfile
+import time
 import unittest
 from unittest import mock
 
@@ -12,12 +17,33 @@ class TestCliMisc(unittest.TestCase):
     @mock.patch("vw2html.cli.parse_args")
     @mock.patch("vw2html.cli.VimWiki2HTMLConverter")
     def test_main(self, vw2hc, args):
-        args.return_value = mock.MagicMock()
+        args.return_value = mock.MagicMock(watch=False)
         converted = mock.MagicMock()
         obj = vw2hc()
         obj.convert.return_value = converted
         self.assertEqual(cli.main(), converted)
 
+    def test_time_budget(self):
+        with (self.assertRaises(cli.PageTimeoutError),
+              cli._time_budget(0.01)):
+            time.sleep(1)
+
+    def test_no_time_budget(self):
+        with cli._time_budget(0):
+            time.sleep(0.02)
+
+    def test_write_file_interrupted(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        fname = os.path.join(path, 'foo.html')
+        cli._write_file(fname, 'old')
+        with (mock.patch('os.replace', side_effect=cli.PageTimeoutError),
+              self.assertRaises(cli.PageTimeoutError)):
+            cli._write_file(fname, 'new')
+        self.assertEqual(os.listdir(path), ['foo.html'])
+        with open(fname) as fobj:
+            self.assertEqual(fobj.read(), 'old')
+
     def test_abspath(self):
         os.environ['FOO'] = '/tmp/bar'
         self.assertEqual('/tmp/foo', cli.abspath("/tmp/bar/../baz/../foo"))
@@ -52,6 +78,205 @@ class TestCliMisc(unittest.TestCase):
         self.assertEqual(cli._validate_output(fname), fname)
 
 
+class TestScheduling(unittest.TestCase):
+
+    @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
+                        update=mock.MagicMock(return_value=None),
+                        read_config=mock.MagicMock(return_value=None))
+    def setUp(self):
+        self.conv = cli.VimWiki2HTMLConverter(mock.MagicMock())
+        self.conv.path = '/tmp/wiki'
+        self.conv._manifest = mock.MagicMock(pages={})
+
+    def test_chunks_longest_first(self):
+        weights = {'a': 1, 'b': 10, 'c': 1, 'd': 1, 'e': 1}
+        self.assertEqual(self.conv._get_chunks(weights, 1),
+                         [['b'], ['a', 'c', 'd'], ['e']])
+
+    def test_chunks_single(self):
+        self.assertEqual(self.conv._get_chunks({'a': 0}, 4), [['a']])
+
+    def test_weights_from_manifest(self):
+        fd, fname = tempfile.mkstemp(suffix='.wiki', dir='/tmp')
+        os.write(fd, b'x' * 20)
+        os.close(fd)
+        self.conv.path = os.path.dirname(fname)
+        self.conv._manifest.pages = {'foo.wiki': {'time': 2, 'size': 10}}
+        weights = self.conv._get_weights([os.path.join(self.conv.path,
+                                                       'foo.wiki'), fname])
+        os.unlink(fname)
+        self.assertEqual(weights[os.path.join(self.conv.path, 'foo.wiki')],
+                         2)
+        # 5 bytes per second, according to the conversion time of foo.wiki
+        self.assertEqual(weights[fname], 4)
+
+
+class TestTemplate(unittest.TestCase):
+
+    @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
+                        update=mock.MagicMock(return_value=None),
+                        read_config=mock.MagicMock(return_value=None))
+    def setUp(self):
+        self.conv = cli.VimWiki2HTMLConverter(mock.MagicMock())
+        self.conv.path = tempfile.mkdtemp()
+        self.conv.template_path = self.conv.path
+        self.conv.css_name = '/tmp/style.css'
+        self._fname = os.path.join(self.conv.path, 'foo.tpl')
+        with open(self._fname, 'w') as fobj:
+            fobj.write('<a href="%root_path%%css%">%title%</a>%content%')
+
+    def tearDown(self):
+        os.unlink(self._fname)
+        os.rmdir(self.conv.path)
+
+    def test_render(self):
+        template = cli.Template('%title%|%css%|%content%|%date%%title%')
+        self.assertEqual(template.render(title='t', content='c', date='d'),
+                         't|%css%|c|dt')
+        template = cli.Template('%css%', 'style.css')
+        self.assertEqual(template.render(), 'style.css')
+
+    def test_loaded_once(self):
+        with mock.patch('builtins.open', wraps=open) as open_:
+            for _ in range(3):
+                template = self.conv.get_template('foo')
+        self.assertEqual(open_.call_count, 1)
+        self.assertEqual(template.render(root_path='../', title='t',
+                                         content='c'),
+                         '<a href="../style.css">t</a>c')
+
+    def test_reloaded_on_change(self):
+        self.conv.get_template('foo')
+        with open(self._fname, 'w') as fobj:
+            fobj.write('changed %content%')
+        self.assertEqual(self.conv.get_template('foo').render(content='c'),
+                         'changed c')
+
+    def test_root_path(self):
+        self.assertEqual(self.conv._get_root_path(
+            os.path.join(self.conv.path, 'a.wiki')), '')
+        self.assertEqual(self.conv._get_root_path(
+            os.path.join(self.conv.path, 'b/c/a.wiki')), '../../')
+
+    def test_assets_copied_once(self):
+        self.conv.copy_template_assets = mock.MagicMock()
+        for _ in range(3):
+            self.conv._copy_used_template_assets('foo')
+        self.conv.copy_template_assets.assert_called_once()
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self._source = tempfile.mkdtemp()
+        self._output = tempfile.mkdtemp()
+        self._page = os.path.join(self._source, 'index.wiki')
+        self._template = os.path.join(self._source, 'default.tpl')
+        for fname, contents in ((self._page, '= foo ='),
+                                (os.path.join(self._source, 'bar.wiki'),
+                                 'bar'),
+                                (self._template, '<html>%content%</html>')):
+            with open(fname, 'w') as fobj:
+                fobj.write(contents)
+        self.args = argparse.Namespace(root=self._source, template=None,
+                                       stylesheet=None, source=self._source,
+                                       output=self._output,
+                                       config='/nonexistent', force=False,
+                                       jobs=1, executor=None,
+                                       page_timeout=None, slowest=None,
+                                       profile=None, asset_mode=None)
+
+    def tearDown(self):
+        shutil.rmtree(self._source)
+        shutil.rmtree(self._output)
+
+    def _convert(self):
+        """
+        Run the build, return names of the converted pages.
+        """
+        converter = cli.VimWiki2HTMLConverter(self.args)
+        converter.progress = False
+        with mock.patch.object(converter, '_convert',
+                               wraps=converter._convert) as convert:
+            self.assertEqual(converter.convert(), 0)
+        return sorted(os.path.basename(x.args[0])
+                      for x in convert.call_args_list)
+
+    def test_noop_rebuild(self):
+        self.assertEqual(self._convert(), ['bar.wiki', 'index.wiki'])
+        self.assertEqual(self._convert(), [])
+
+    def test_touched_source(self):
+        self._convert()
+        os.utime(self._page, ns=(0, 0))
+        self.assertEqual(self._convert(), [])
+        with open(self._page, 'w') as fobj:
+            fobj.write('= bar =')
+        self.assertEqual(self._convert(), ['index.wiki'])
+
+    def test_profile(self):
+        self.args.profile = os.path.join(self._output, 'profile.json')
+        self._convert()
+        with open(self.args.profile) as fobj:
+            profile = json.load(fobj)
+        self.assertEqual(profile['pages'], 2)
+        self.assertEqual(profile['phases']['copy_assets']['calls'], 1)
+        self.assertEqual(profile['phases']['write']['calls'], 2)
+
+    def test_profile_noop_rebuild(self):
+        self._convert()
+        self.args.profile = os.path.join(self._output, 'profile.json')
+        self.assertEqual(self._convert(), [])
+        with open(self.args.profile) as fobj:
+            profile = json.load(fobj)
+        self.assertEqual(profile['pages'], 0)
+        self.assertEqual(list(profile['phases']), ['copy_assets'])
+
+    def test_template_changed(self):
+        self._convert()
+        with open(self._template, 'w') as fobj:
+            fobj.write('<html><body>%content%</body></html>')
+        self.assertEqual(self._convert(), ['bar.wiki', 'index.wiki'])
+        with open(os.path.join(self._output, 'bar.html')) as fobj:
+            self.assertTrue(fobj.read().startswith('<html><body>'))
+
+
+class TestProgress(unittest.TestCase):
+
+    def test_track(self):
+        stream = io.StringIO()
+        progress = cli.Progress(3, stream)
+        progress.interval = 0
+        self.assertEqual(list(progress.track('abc')), ['a', 'b', 'c'])
+        self.assertIn('[1/3]', stream.getvalue())
+        self.assertIn('[3/3]', stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith('\r\033[K'))
+
+    def test_line(self):
+        progress = cli.Progress(120, io.StringIO())
+        progress.count = 20
+        self.assertEqual(progress.get_line(progress._start + 10),
+                         '[ 20/120] 2.0 pages/s, ETA 0:00:50')
+        progress.count = 0
+        self.assertEqual(progress.get_line(progress._start + 10),
+                         '[  0/120] 0.0 pages/s, ETA -:--:--')
+
+    @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
+                        update=mock.MagicMock(return_value=None),
+                        read_config=mock.MagicMock(return_value=None))
+    def test_report_slowest(self):
+        conv = cli.VimWiki2HTMLConverter(mock.MagicMock())
+        conv.path = '/tmp/wiki'
+        conv.slowest = 2
+        results = [{'path': f'/tmp/wiki/{x}.wiki', 'time': x, 'error': None}
+                   for x in (3, 1, 4, 2)]
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            conv._report_slowest(results)
+        self.assertEqual(stdout.getvalue(), '2 slowest page(s):\n'
+                         '     4.000s  4.wiki\n'
+                         '     3.000s  3.wiki\n')
+
+
 class TestCliMain(unittest.TestCase):
 
     def setUp(self):
@@ -83,7 +308,10 @@ class TestCliMain(unittest.TestCase):
         args = argparse.Namespace(root=os.path.dirname(self._source),
                                   template=None, stylesheet=None,
                                   source=self._source, output=self._output,
-                                  config=cli.CONF_PATH, force=False)
+                                  config=cli.CONF_PATH, force=False, jobs=None,
+                                  executor=None,
+                                  page_timeout=None, slowest=None,
+                                  profile=None, asset_mode=None)
         vw2hc = cli.VimWiki2HTMLConverter(args)
         self.assertIsInstance(vw2hc, cli.VimWiki2HTMLConverter)
         self.assertEqual(vw2hc.path, os.path.dirname(self._source))
@@ -104,7 +332,10 @@ class TestCliMain(unittest.TestCase):
         args = argparse.Namespace(root=self._source, template=None,
                                   stylesheet=None, source=self._source,
                                   output=self._output, config=cli.CONF_PATH,
-                                  force=False)
+                                  force=False, jobs=None,
+                                  executor=None,
+                                  page_timeout=None, slowest=None,
+                                  profile=None, asset_mode=None)
 
         conv = cli.VimWiki2HTMLConverter(args)
         self.assertIsInstance(conv, cli.VimWiki2HTMLConverter)
@@ -123,7 +354,10 @@ class TestCliMain(unittest.TestCase):
         args = argparse.Namespace(root=self._source, template=None,
                                   stylesheet=None, source=self._source,
                                   output=self._output, config=cli.CONF_PATH,
-                                  force=False)
+                                  force=False, jobs=None,
+                                  executor=None,
+                                  page_timeout=None, slowest=None,
+                                  profile=None, asset_mode=None)
         with open(cli.CONF_PATH, 'w') as fobj:
             fobj.write('wrong stuff = even more wrong')
 
@@ -140,3 +374,34 @@ class TestCliMain(unittest.TestCase):
         self.assertEqual(conv.template_ext,
                          cli.VimWiki2HTMLConverter.template_ext)
         self.assertIsNone(conv.css_name)
+
+    def test_pickle_configuration_only(self):
+        args = argparse.Namespace(root=os.path.dirname(self._source),
+                                  template=None, stylesheet=None,
+                                  source=self._source, output=self._output,
+                                  config=cli.CONF_PATH, force=False, jobs=None,
+                                  executor=None,
+                                  page_timeout=None, slowest=None,
+                                  profile=None, asset_mode=None)
+        vw2hc = cli.VimWiki2HTMLConverter(args)
+        vw2hc._sources = ['foo'] * 1000
+        copy = pickle.loads(pickle.dumps(vw2hc))
+        self.assertEqual(copy.path, vw2hc.path)
+        self.assertEqual(copy.path_html, vw2hc.path_html)
+        self.assertEqual(copy._template, vw2hc._template)
+        self.assertFalse(hasattr(copy, '_sources'))
+        self.assertFalse(hasattr(copy, '_assets'))
+
+    @mock.patch('vw2html.html.VimWiki2Html.convert')
+    def test_convert_failure(self, convert):
+        convert.side_effect = ValueError('foo')
+        args = argparse.Namespace(root=os.path.dirname(self._source),
+                                  template=None, stylesheet=None,
+                                  source=self._source, output=self._output,
+                                  config=cli.CONF_PATH, force=False, jobs=None,
+                                  executor=None, page_timeout=None, slowest=None,
+                                  profile=None, asset_mode=None)
+        vw2hc = cli.VimWiki2HTMLConverter(args)
+        result = vw2hc._convert(self._source)
+        self.assertEqual(result['error'], 'ValueError: foo')
+        self.assertEqual(os.listdir(self._output), [])
@@ -69,6 +69,16 @@ class TestCodeBlock(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_multiple_pre(self):
+        src = '{{{\nfoo\n}}}\ntext\n  {{{\nbar\n  }}}\n{{{\nbaz\n}}}'
+        exp = ('<p>\n<pre class="code literal-block">\nfoo</pre>\ntext\n'
+               '  <pre class="code literal-block">\nbar</pre>\n'
+               '<pre class="code literal-block">\nbaz</pre>\n</p>')
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+
 
 class TestInlineCode(unittest.TestCase):
 
@@ -109,6 +119,15 @@ class TestInlineCode(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_inline_double_backticks(self):
+        src = '``foo`` bar ``baz``'
+        exp = ('<p>\n`<code>foo</code><code> bar </code><code>baz</code>`'
+               '\n</p>')
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+
     def test_inline_code_invalid(self):
         src = '`foo` and ```'
         exp = '<p>\n<code>foo</code> and ```\n</p>'
@@ -0,0 +1,65 @@
+import pickle
+import unittest
+from unittest import mock
+
+from vw2html import cli
+from vw2html import document
+from vw2html import html
+
+
+class TestDocument(unittest.TestCase):
+
+    @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
+                        update=mock.MagicMock(return_value=None),
+                        read_config=mock.MagicMock(return_value=None))
+    def setUp(self):
+        conf = cli.VimWiki2HTMLConverter(mock.MagicMock())
+        conf.path = '/tmp/wiki'
+        conf.path_html = '/tmp/wiki_html'
+        self.converter = html.VimWiki2Html('/tmp/wiki/foo.wiki', conf)
+        # don't read any file
+        self.converter.read_wiki_file = mock.MagicMock(return_value=None)
+        self.converter.wiki_contents = ('%toc\n\n'
+                                        '= [[foo|Foo]] =\n'
+                                        'some `code` text\n\n'
+                                        '* item https://example.com\n'
+                                        '  * nested\n\n'
+                                        '| a | b |\n'
+                                        '| \\/ | > |\n\n'
+                                        'term:: definition\n')
+
+    def test_render_twice(self):
+        self.converter.convert()
+        doc = self.converter.document
+        self.assertEqual(doc.render(), doc.render())
+        self.assertEqual(doc.render(), self.converter.html)
+
+    def test_pickle(self):
+        self.converter.convert()
+        doc = pickle.loads(pickle.dumps(self.converter.document))
+        self.assertEqual(doc.render(), self.converter.html)
+
+    def test_links(self):
+        self.converter.convert()
+        self.assertEqual([x.target for x in self.converter.document.links],
+                         ['foo', 'https://example.com'])
+
+    def test_nodes_without_dict(self):
+        self.converter.convert()
+        for node in self.converter.document.blocks:
+            self.assertFalse(hasattr(node, '__dict__'), node)
+
+    def test_not_converted(self):
+        self.assertIsNone(self.converter.document)
+        self.assertEqual(self.converter.html, '')
+
+
+class TestRenderNodes(unittest.TestCase):
+
+    def test_list(self):
+        nodes = [document.ListOpen('ul', 'done4', 'foo'),
+                 document.ListItem(None, 'bar'),
+                 document.ListClose('ul')]
+        self.assertEqual(document.render_nodes(nodes),
+                         '<ul>\n<li class="done4">\nfoo</li>\n<li>\nbar'
+                         '</li>\n</ul>\n')
@@ -0,0 +1,70 @@
+import concurrent.futures
+import unittest
+from unittest import mock
+
+from vw2html import executor
+
+_STATE = {}
+
+
+def _init(value):
+    _STATE['value'] = value
+
+
+def _task(item):
+    return item * _STATE['value']
+
+
+class TestExecutors(unittest.TestCase):
+
+    def _check(self, executor_class):
+        with executor_class(2, _init, (3,)) as exe:
+            result = exe.imap_unordered(_task, [1, 2, 3])
+            self.assertEqual(sorted(result), [3, 6, 9])
+
+    def test_sequential(self):
+        self._check(executor.SequentialExecutor)
+
+    def test_threads(self):
+        self._check(executor.ThreadExecutor)
+
+    def test_processes(self):
+        self._check(executor.ProcessExecutor)
+
+    @unittest.skipUnless(hasattr(concurrent.futures,
+                                 'InterpreterPoolExecutor'),
+                         'Requires Python 3.14')
+    def test_interpreters(self):
+        self._check(executor.InterpreterExecutor)
+
+
+class TestGetExecutorClass(unittest.TestCase):
+
+    def test_auto_single_job(self):
+        self.assertIs(executor.get_executor_class('auto', 1),
+                      executor.SequentialExecutor)
+
+    @mock.patch('vw2html.executor.is_free_threaded',
+                mock.MagicMock(return_value=False))
+    def test_auto(self):
+        self.assertIs(executor.get_executor_class('auto', 0),
+                      executor.ProcessExecutor)
+
+    @mock.patch('vw2html.executor.is_free_threaded',
+                mock.MagicMock(return_value=True))
+    def test_auto_free_threaded(self):
+        self.assertIs(executor.get_executor_class('auto', 0),
+                      executor.ThreadExecutor)
+
+    def test_explicit(self):
+        self.assertIs(executor.get_executor_class('threads', 1),
+                      executor.ThreadExecutor)
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, executor.get_executor_class, 'foo')
+
+    @unittest.skipIf(hasattr(concurrent.futures, 'InterpreterPoolExecutor'),
+                     'Python 3.14 provides subinterpreters')
+    def test_interpreters_unavailable(self):
+        self.assertRaises(ValueError, executor.get_executor_class,
+                          'interpreters')
@@ -122,4 +122,15 @@ class TestWikiLink(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_many_links(self):
+        src = ' '.join(f'[[foo{x}]] https://meh.us/{x}' for x in range(3))
+        exp = ('<p>\n' + ' '.join(f'<a href="foo{x}.html">foo{x}</a> '
+                                  f'<a href="https://meh.us/{x}">'
+                                  f'https://meh.us/{x}</a>'
+                                  for x in range(3)) + '\n</p>')
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+
 # TODO: add tests for transclusions, relative external links and diary
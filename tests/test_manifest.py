@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vw2html import manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self._output = tempfile.mkdtemp()
+        self._source_dir = tempfile.mkdtemp()
+        self._source = os.path.join(self._source_dir, 'foo.wiki')
+        self._html = os.path.join(self._output, 'foo.html')
+        with open(self._source, 'w') as fobj:
+            fobj.write('foo')
+        with open(self._html, 'w') as fobj:
+            fobj.write('<p>foo</p>')
+        self.deps = {'/tmp/default.tpl': 'a'}
+
+    def get_deps(self, template):
+        if template == 'custom':
+            return {'/tmp/custom.tpl': 'b'}
+        return self.deps
+
+    def tearDown(self):
+        shutil.rmtree(self._output)
+        shutil.rmtree(self._source_dir)
+
+    def test_no_entry(self):
+        mf = manifest.Manifest(self._output)
+        self.assertTrue(mf.is_stale('foo.wiki', self._source, self._html,
+                                    self.get_deps))
+
+    def test_unchanged(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        mf.save()
+
+        mf = manifest.Manifest(self._output)
+        mf.load()
+        self.assertFalse(mf.is_stale('foo.wiki', self._source, self._html,
+                                     self.get_deps))
+
+    def test_touched_only(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        os.utime(self._source, (0, 0))
+        self.assertFalse(mf.is_stale('foo.wiki', self._source, self._html,
+                                     self.get_deps))
+        self.assertEqual(mf.pages['foo.wiki']['mtime'], 0)
+
+    def test_contents_changed(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        with open(self._source, 'w') as fobj:
+            fobj.write('bar')
+        os.utime(self._source, (0, 0))
+        self.assertTrue(mf.is_stale('foo.wiki', self._source, self._html,
+                                    self.get_deps))
+
+    def test_dependency_changed(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        self.deps = {'/tmp/default.tpl': 'c'}
+        self.assertTrue(mf.is_stale('foo.wiki', self._source, self._html,
+                                    self.get_deps))
+
+    def test_other_template_changed(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, {'/tmp/custom.tpl': 'b'},
+               template='custom')
+        self.deps = {'/tmp/default.tpl': 'c'}
+        self.assertFalse(mf.is_stale('foo.wiki', self._source, self._html,
+                                     self.get_deps))
+
+    def test_output_removed(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        os.unlink(self._html)
+        self.assertTrue(mf.is_stale('foo.wiki', self._source, self._html,
+                                    self.get_deps))
+
+    def test_nohtml_without_output(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps, nohtml=True)
+        os.unlink(self._html)
+        self.assertFalse(mf.is_stale('foo.wiki', self._source, self._html,
+                                     self.get_deps))
+
+    def test_other_version(self):
+        mf = manifest.Manifest(self._output)
+        mf.add('foo.wiki', self._source, self.deps)
+        mf.save()
+        with open(mf.fname) as fobj:
+            contents = fobj.read()
+        with open(mf.fname, 'w') as fobj:
+            fobj.write(contents.replace(manifest.vw2html.__version__,
+                                        'foo'))
+
+        mf = manifest.Manifest(self._output)
+        mf.load()
+        self.assertEqual(mf.pages, {})
+
+    def test_other_asset_mode(self):
+        mf = manifest.Manifest(self._output, 'symlink')
+        mf.add('foo.wiki', self._source, self.deps)
+        mf.save()
+
+        mf = manifest.Manifest(self._output, 'symlink')
+        mf.load()
+        self.assertIn('foo.wiki', mf.pages)
+        mf = manifest.Manifest(self._output, 'copy')
+        mf.load()
+        self.assertEqual(mf.pages, {})
+
+    def test_broken_manifest(self):
+        mf = manifest.Manifest(self._output)
+        with open(mf.fname, 'w') as fobj:
+            fobj.write('{')
+        mf.load()
+        self.assertEqual(mf.pages, {})
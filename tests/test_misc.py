@@ -101,6 +101,22 @@ class TestTitlePlaceholder(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.title, 'My great Title!')
 
+    def test_title_removed(self):
+        src = '%title bar\n%title baz\nfoo'
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.title, 'bar')
+        self.assertEqual(self.converter.html, '\n\n\n\n<p>\nfoo\n</p>')
+
+    def test_title_in_code_block(self):
+        src = '{{{\n%title bar\n}}}'
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.title, 'foo')
+        self.assertIn('%title bar', self.converter.html)
+
 
 class TestNoHtmlPlaceholder(unittest.TestCase):
 
@@ -192,10 +208,13 @@ class TestDatePlaceholder(unittest.TestCase):
         src = '\n           %date \n'
 
         mock_open = mock.mock_open(read_data=src)
-        with mock.patch("builtins.open", mock_open):
+        now = datetime.datetime(2024, 1, 31, 23, 30, tzinfo=datetime.UTC)
+        with (mock.patch("builtins.open", mock_open),
+              mock.patch('vw2html.html.datetime.datetime') as dt):
+            dt.now.return_value = now
             self.converter.convert()
-        self.assertEqual(self.converter.date,
-                         datetime.datetime.now().strftime('%Y-%m-%d'))
+        dt.now.assert_called_once_with(tz=datetime.UTC)
+        self.assertEqual(self.converter.date, '2024-01-31')
 
     def test_date_set_to_date(self):
         src = '\n           %date 1984-06-08   \n'
@@ -205,6 +224,19 @@ class TestDatePlaceholder(unittest.TestCase):
             self.converter.convert()
         self.assertEqual(self.converter.date, '1984-06-08')
 
+    def test_date_without_value(self):
+        src = '%date\nfoo'
+
+        mock_open = mock.mock_open(read_data=src)
+        now = datetime.datetime(2024, 1, 31, 23, 30, tzinfo=datetime.UTC)
+        with (mock.patch("builtins.open", mock_open),
+              mock.patch('vw2html.html.datetime.datetime') as dt):
+            dt.now.return_value = now
+            self.converter.convert()
+        dt.now.assert_called_once_with(tz=datetime.UTC)
+        self.assertEqual(self.converter.date, '2024-01-31')
+        self.assertEqual(self.converter.html, '\n\n<p>\nfoo\n</p>')
+
 
 class TestPlainHTMLPlaceholder(unittest.TestCase):
 
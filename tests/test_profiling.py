@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from vw2html import profiling
+
+
+class TestProfile(unittest.TestCase):
+
+    @mock.patch('time.perf_counter')
+    def test_nested_phases(self, perf_counter):
+        perf_counter.side_effect = [0, 1, 4, 10]
+        profile = profiling.Profile()
+        with profile.phase('outer'), profile.phase('inner'):
+            pass
+        self.assertEqual(profile.phases, {'inner': [1, 3], 'outer': [1, 7]})
+
+    def test_phase_on_error(self):
+        profile = profiling.Profile()
+        with self.assertRaises(ValueError), profile.phase('foo'):
+            raise ValueError
+        self.assertEqual(profile.phases['foo'][0], 1)
+        self.assertEqual(profile._nested, [])
+
+    def test_merge(self):
+        profile = profiling.Profile()
+        profile.merge({'foo': [1, 2]})
+        profile.merge({'foo': [2, 1], 'bar': [1, 1]})
+        self.assertEqual(profile.phases, {'foo': [3, 3], 'bar': [1, 1]})
+
+    def test_save(self):
+        profile = profiling.Profile()
+        profile.merge({'foo': [1, 1], 'bar': [2, 3]})
+        fd, fname = tempfile.mkstemp()
+        os.close(fd)
+        profile.save(fname, pages=2)
+        with open(fname) as fobj:
+            data = json.load(fobj)
+        os.unlink(fname)
+        self.assertEqual(data, {'pages': 2, 'total': 4,
+                                'phases': {'bar': {'calls': 2, 'time': 3},
+                                           'foo': {'calls': 1, 'time': 1}}})
+        self.assertEqual(list(data['phases']), ['bar', 'foo'])
+
+    def test_null(self):
+        with profiling.NULL.phase('foo'):
+            pass
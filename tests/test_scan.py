@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+from vw2html import scan
+
+
+class TestScan(unittest.TestCase):
+
+    def setUp(self):
+        self._root = tempfile.mkdtemp()
+        for path in ('index.wiki', 'image.png', 'sub/page.wiki',
+                     'sub/deep/page.wiki', '.git/objects/foo.wiki',
+                     'html/index.wiki'):
+            self._create(path)
+
+    def tearDown(self):
+        shutil.rmtree(self._root)
+
+    def _create(self, path, contents=''):
+        path = os.path.join(self._root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fobj:
+            fobj.write(contents)
+
+    def _scan(self, exclude=(), patterns=('.git',)):
+        return sorted(os.path.relpath(x, self._root) for x in
+                      scan.scan(self._root, '.wiki', exclude, patterns))
+
+    def test_scan(self):
+        self.assertIsInstance(scan.scan(self._root, '.wiki'),
+                              types.GeneratorType)
+        self.assertEqual(self._scan(), ['html/index.wiki', 'index.wiki',
+                                        'sub/deep/page.wiki',
+                                        'sub/page.wiki'])
+
+    def test_exclude_output(self):
+        self.assertEqual(self._scan([os.path.join(self._root, 'html')]),
+                         ['index.wiki', 'sub/deep/page.wiki',
+                          'sub/page.wiki'])
+
+    def test_patterns(self):
+        self.assertEqual(self._scan(patterns=['.git', 'deep/', 'index.*']),
+                         ['sub/page.wiki'])
+        # pattern with slash is matched against the path
+        self.assertEqual(self._scan(patterns=['.git', 'html',
+                                              'sub/*.wiki']),
+                         ['index.wiki', 'sub/deep/page.wiki'])
+
+    def test_ignore_file(self):
+        self._create('sub/.vw2htmlignore', '# comment\n\ndeep/*\n')
+        self._create('.vw2htmlignore', 'html/\n')
+        self.assertEqual(self._scan(), ['index.wiki', 'sub/page.wiki'])
+
+    def test_ignore_file_scope(self):
+        self._create('sub/.vw2htmlignore', 'index.wiki\n')
+        self.assertEqual(self._scan(), ['html/index.wiki', 'index.wiki',
+                                        'sub/deep/page.wiki',
+                                        'sub/page.wiki'])
+
+    def test_symlink_loop(self):
+        os.symlink(self._root, os.path.join(self._root, 'sub', 'loop'))
+        os.symlink(os.path.join(self._root, 'sub', 'deep'),
+                   os.path.join(self._root, 'deep'))
+        result = self._scan(patterns=['.git', 'html'])
+        self.assertEqual(len(result), 3)
+        self.assertIn('index.wiki', result)
+        self.assertIn('sub/page.wiki', result)
+
+    def test_is_excluded(self):
+        self._create('sub/.vw2htmlignore', 'deep/\n')
+        for path, excluded in (('index.wiki', False),
+                               ('.git/objects/foo.wiki', True),
+                               ('sub/page.wiki', False),
+                               ('sub/deep/page.wiki', True),
+                               ('deep', False)):
+            self.assertEqual(scan.is_excluded(
+                self._root, os.path.join(self._root, path), ['.git']),
+                excluded, path)
+        self.assertFalse(scan.is_excluded(self._root, '/tmp/.git', ['.git']))
+
+    def test_read_patterns(self):
+        self._create('.vw2htmlignore', '*.bak\n')
+        self._create('sub/.vw2htmlignore', 'deep/\n')
+        patterns = scan.read_patterns(self._root,
+                                      os.path.join(self._root, 'sub'),
+                                      ['.git'])
+        self.assertEqual([x.base for x in patterns], ['', ''])
+        self.assertTrue(patterns[1].match('sub/page.bak', 'page.bak', False))
+        self.assertEqual(len(scan.read_patterns(
+            self._root, os.path.join(self._root, 'sub', 'deep'))), 2)
+        self.assertEqual(len(scan.read_patterns(self._root, '/tmp/foo',
+                                                ['.git'])), 1)
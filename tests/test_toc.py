@@ -30,6 +30,31 @@ class TestTableOfContents(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_toc_inline_code(self):
+        src = '%toc\n\n=`foo`=\n'
+        exp = ('<p>\n<nav>\n'
+               '<ul><li><a href="#`foo`"><code>foo</code></a></li>\n</ul>\n'
+               '</nav>\n</p>\n\n'
+               '<h1 id="`foo`"><a href="#`foo`"><code>foo</code></a></h1>\n')
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+
+    def test_toc_link(self):
+        src = '%toc\n\n=[[foo]]=\n'
+        exp = ('<p>\n<nav>\n'
+               '<ul><li><a href="#[[foo]]"><a href="foo.html">foo</a></a>'
+               '</li>\n</ul>\n'
+               '</nav>\n</p>\n\n'
+               '<h1 id="[[foo]]"><a href="#[[foo]]"><a href="foo.html">foo</a>'
+               '</a></h1>\n')
+
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, exp)
+        self.assertEqual(len(self.converter._links), 1)
+
     def test_more_complex(self):
         src = ('%toc\n\n'
                '=foo=\n'
@@ -67,6 +92,65 @@ class TestTableOfContents(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, '')
 
+    def test_toc_without_headers_in_paragraph(self):
+        src = 'foo\n%toc\nbar\n'
+        self.converter.wiki_contents = src
+        with mock.patch.object(self.converter, '_process_linewise',
+                               wraps=self.converter._process_linewise) as pl:
+            self.converter.convert()
+        pl.assert_called_once()
+        self.assertEqual(self.converter.html,
+                         '<p>\nfoo\n</p>\n\n<p>\nbar\n</p>')
+
+    def test_toc_without_headers_twice(self):
+        src = '%toc\n%toc\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html, '')
+
+    def test_toc_without_headers_before_list(self):
+        src = '%toc\n* item\nfoo\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html,
+                         '\n<ul>\n<li>\nitem\n</li>\n</ul>\n\n'
+                         '<p>\nfoo\n</p>')
+
+    def test_toc_without_headers_between_tables(self):
+        src = '| a |\n%toc\n| b |\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html,
+                         '<table><tbody><tr><td> a </td></tr></tbody></table>'
+                         '\n\n<table><tbody><tr><td> b </td></tr></tbody>'
+                         '</table>')
+
+    def test_toc_in_list(self):
+        src = '* foo\n  %toc\n* bar\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html,
+                         '<ul>\n<li>\nfoo\n\n</li>\n<li>\nbar\n</li>\n'
+                         '</ul>\n')
+
+    def test_toc_in_list_with_headers(self):
+        src = '* foo\n  %toc\n* bar\n= baz =\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertIn('<li>\nfoo\n<nav>', self.converter.html)
+
+    def test_toc_after_list_followed_by_dedented_table(self):
+        src = ('  2) two\n%toc\n~~s~~\nx\nterm:: def\n'
+               '  | in list table |\n')
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html,
+                         '<ol>\n<li>\ntwo\n</li>\n</ol>\n\n'
+                         '<p>\n<del>s</del>\nx\n<table class="center">'
+                         '<tbody><tr><td> in list table </td></tr></tbody>'
+                         '</table>\n</p>\n<dl>\n<dt>term</dt>\n<dd>\n'
+                         '<p>def</p>\n</dd>\n</dl>\n')
+
 class TestTableOfContentsFirstLevel(unittest.TestCase):
 
     @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
@@ -93,6 +177,14 @@ class TestTableOfContentsFirstLevel(unittest.TestCase):
         self.converter.convert()
         self.assertEqual(self.converter.html, exp)
 
+    def test_toc_without_items_before_table(self):
+        src = '%toc\n== mismatched ===\n| c | > |\n'
+        self.converter.wiki_contents = src
+        self.converter.convert()
+        self.assertEqual(self.converter.html,
+                         '\n== mismatched ===\n<table><tbody><tr>'
+                         '<td colspan="2"> c </td></tr></tbody></table>')
+
 class TestTableOfContentsSecondLevel(unittest.TestCase):
 
     @mock.patch.multiple('vw2html.cli.VimWiki2HTMLConverter',
@@ -0,0 +1,202 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from vw2html import cli, watch
+
+
+class TestPollingWatcher(unittest.TestCase):
+    watcher_class = watch.PollingWatcher
+
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._output = os.path.join(self._path, 'out')
+        os.makedirs(os.path.join(self._path, 'sub'))
+        os.makedirs(self._output)
+        self._source = os.path.join(self._path, 'sub', 'foo.wiki')
+        with open(self._source, 'w') as fobj:
+            fobj.write('foo')
+        watch.PollingWatcher.interval = 0.01
+        os.makedirs(os.path.join(self._path, '.git'))
+        self.watcher = self.watcher_class(self._path, exclude=[self._output],
+                                          patterns=['.git'])
+
+    def tearDown(self):
+        self.watcher.close()
+        watch.PollingWatcher.interval = 0.5
+        shutil.rmtree(self._path)
+
+    def test_changed_file(self):
+        with open(self._source, 'w') as fobj:
+            fobj.write('foobar')
+        self.assertEqual(self.watcher.wait(), {self._source})
+
+    def test_new_file(self):
+        fname = os.path.join(self._path, 'bar.wiki')
+        with open(fname, 'w') as fobj:
+            fobj.write('bar')
+        self.assertEqual(self.watcher.wait(), {fname})
+
+    def test_excluded(self):
+        with open(os.path.join(self._output, 'foo.html'), 'w') as fobj:
+            fobj.write('foo')
+        with open(self._source, 'w') as fobj:
+            fobj.write('foobar')
+        self.assertEqual(self.watcher.wait(), {self._source})
+
+    def test_excluded_pattern(self):
+        with open(os.path.join(self._path, '.git', 'index'), 'w') as fobj:
+            fobj.write('foo')
+        with open(self._source, 'w') as fobj:
+            fobj.write('foobar')
+        self.assertEqual(self.watcher.wait(), {self._source})
+
+    def test_excluded_by_ignore_file(self):
+        os.makedirs(os.path.join(self._path, 'sub', 'tmp', 'deep'))
+        with open(os.path.join(self._path, 'sub', '.vw2htmlignore'),
+                  'w') as fobj:
+            fobj.write('tmp/\n')
+        self.watcher.close()
+        self.watcher = self.watcher_class(self._path,
+                                          exclude=[self._output],
+                                          patterns=['.git'])
+        with open(os.path.join(self._path, 'sub', 'tmp', 'deep', 'x.wiki'),
+                  'w') as fobj:
+            fobj.write('foo')
+        with open(self._source, 'w') as fobj:
+            fobj.write('foobar')
+        self.assertEqual(self.watcher.wait(), {self._source})
+
+    def test_ignore_file_read_once(self):
+        os.makedirs(os.path.join(self._path, 'sub', 'a', 'b'))
+        with open(os.path.join(self._path, 'sub', '.vw2htmlignore'),
+                  'w') as fobj:
+            fobj.write('tmp/\n')
+        with mock.patch('vw2html.scan.read_ignore_file',
+                        wraps=watch.scan.read_ignore_file) as read:
+            list(self.watcher._walk(self._path))
+        read.assert_called_once_with(
+            os.path.join(self._path, 'sub', '.vw2htmlignore'), 'sub')
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), 'Linux only')
+class TestInotifyWatcher(TestPollingWatcher):
+    watcher_class = watch.InotifyWatcher
+
+    def test_new_directory(self):
+        fname = os.path.join(self._path, 'bar', 'bar.wiki')
+        os.makedirs(os.path.dirname(fname))
+        with open(fname, 'w') as fobj:
+            fobj.write('bar')
+        self.assertIn(fname, self.watcher.wait())
+
+
+class TestProcessChanges(unittest.TestCase):
+
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+        self._output = tempfile.mkdtemp()
+        self._template = os.path.join(self._path, 'default.tpl')
+        self._css = os.path.join(self._path, 'style.css')
+        self._image = os.path.join(self._path, 'img.png')
+        for fname, contents in (
+                (os.path.join(self._path, 'index.wiki'), '{{local:img.png}}'),
+                (os.path.join(self._path, 'foo.wiki'), 'foo'),
+                (self._template, '<html>%css% %content%</html>'),
+                (self._css, 'p {}'),
+                (self._image, 'png')):
+            with open(fname, 'w') as fobj:
+                fobj.write(contents)
+        args = argparse.Namespace(root=self._path, template=None,
+                                  stylesheet=self._css, source=self._path,
+                                  output=self._output,
+                                  config='/nonexistent', force=False,
+                                  jobs=1, executor=None, page_timeout=None,
+                                  slowest=None, profile=None,
+                                  asset_mode='copy')
+        self.converter = cli.VimWiki2HTMLConverter(args)
+        self.converter.progress = False
+        self.assertEqual(self.converter.convert(), 0)
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+        shutil.rmtree(self._output)
+
+    def _process_changes(self, changed):
+        """
+        Process changes, return names of the converted pages.
+        """
+        with mock.patch.object(self.converter, '_convert',
+                               wraps=self.converter._convert) as convert:
+            self.converter._process_changes(changed)
+        return sorted(os.path.basename(x.args[0])
+                      for x in convert.call_args_list)
+
+    def _read_output(self, fname):
+        with open(os.path.join(self._output, fname)) as fobj:
+            return fobj.read()
+
+    def test_template_changed(self):
+        with open(self._template, 'w') as fobj:
+            fobj.write('<html><body>%content%</body></html>')
+        self.assertEqual(self._process_changes({self._template}),
+                         ['foo.wiki', 'index.wiki'])
+        self.assertTrue(self._read_output('foo.html')
+                        .startswith('<html><body>'))
+
+    def test_template_unreadable(self):
+        os.unlink(self._template)
+        os.makedirs(self._template)
+        self.assertEqual(self._process_changes({self._template}),
+                         ['foo.wiki', 'index.wiki'])
+
+    def test_stylesheet_changed(self):
+        with open(self._css, 'w') as fobj:
+            fobj.write('body {}')
+        self.assertEqual(self._process_changes({self._css}),
+                         ['foo.wiki', 'index.wiki'])
+        self.assertEqual(self._read_output('style.css'), 'body {}')
+
+    def test_asset_changed(self):
+        with open(self._image, 'w') as fobj:
+            fobj.write('new png')
+        self.assertEqual(self._process_changes({self._image}), [])
+        self.assertEqual(self._read_output('img.png'), 'new png')
+
+    def test_excluded_page(self):
+        draft = os.path.join(self._path, 'drafts', 'draft.wiki')
+        os.makedirs(os.path.dirname(draft))
+        with open(draft, 'w') as fobj:
+            fobj.write('draft')
+        with open(os.path.join(self._path, '.vw2htmlignore'), 'w') as fobj:
+            fobj.write('drafts/\n')
+        self.assertEqual(self._process_changes({draft}), [])
+        self.assertNotIn(os.path.join('drafts', 'draft.wiki'),
+                         self.converter._manifest.pages)
+
+    def test_page_changed(self):
+        self.assertEqual(self._process_changes(
+            {os.path.join(self._path, 'foo.wiki')}), [])
+        with open(os.path.join(self._path, 'foo.wiki'), 'w') as fobj:
+            fobj.write('bar')
+        self.assertEqual(self._process_changes(
+            {os.path.join(self._path, 'foo.wiki')}), ['foo.wiki'])
+
+    @mock.patch('vw2html.watch.get_watcher')
+    def test_watch(self, get_watcher):
+        page = os.path.join(self._path, 'foo.wiki')
+        get_watcher.return_value.wait.side_effect = [{page}, None,
+                                                     KeyboardInterrupt]
+        with mock.patch.object(self.converter,
+                               '_process_changes') as process_changes:
+            self.assertEqual(self.converter.watch(), 0)
+        self.assertEqual(process_changes.call_args_list[0].args[0], {page})
+        # rescan of the whole wiki
+        self.assertEqual(sorted(process_changes.call_args_list[1].args[0]),
+                         sorted([os.path.join(self._path, 'foo.wiki'),
+                                 os.path.join(self._path, 'index.wiki')]))
+        get_watcher.return_value.close.assert_called_once()
@@ -1,3 +1,5 @@
 from . import html
+from .api import Options, RenderResult, render, render_many
+
 __version__ = "0.1.0"
-__all__ = ['html']
+__all__ = ['Options', 'RenderResult', 'html', 'render', 'render_many']
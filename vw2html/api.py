@@ -0,0 +1,80 @@
+"""
+Library interface for converting wiki text to html without touching the
+filesystem. Nothing is read from, nor written to the disk - local files
+referenced by the page are not checked nor copied, but they are listed in the
+result, so the caller decides what to do with them, as well as with caching
+and writing the html:
+
+    >>> import vw2html
+    >>> result = vw2html.render('%title Foo\\n= Bar =\\n[[baz]]')
+    >>> result.title, result.links
+    ('Foo', ['baz'])
+"""
+from vw2html import html
+
+
+class Options:
+    """
+    Options for the conversion. Attributes are named the same as in the
+    converter configuration.
+    """
+    # Root path for the wiki, local files referenced by the page are
+    # resolved relative to it.
+    path: str = ''
+    # skip toplevel headers for table of contents generation, by default
+    # include all. If provided integer larger then 0, all the headers less and
+    # equal for that value will be skipped
+    skip_toc_level: int = 0
+    # not used, as nothing is written, needed by VimWiki2Html
+    path_html: str = ''
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            if not hasattr(self, key):
+                msg = f"Unknown option `{key}'"
+                raise TypeError(msg)
+            setattr(self, key, value)
+
+
+class RenderResult:
+    """
+    Html of the page with its metadata. Title, template and date are None,
+    if they are not set in the page. Links and images are targets as they
+    were written in the page, assets are paths of the local files relative
+    to the wiki root.
+    """
+    __slots__ = ('assets', 'date', 'document', 'html', 'images', 'links',
+                 'nohtml', 'template', 'title')
+
+    def __init__(self, converter):
+        doc = converter.document
+        self.html = converter.html
+        self.title = converter._title  # noqa: SLF001
+        self.template = converter.template
+        self.date = converter.date or None
+        self.nohtml = converter.nohtml
+        self.links = [x.target for x in doc.links] if doc else []
+        self.images = [x.target for x in doc.images] if doc else []
+        self.assets = list(dict.fromkeys(converter.assets))
+        self.document = doc
+
+
+def render(text, options=None):
+    """
+    Convert wiki text to html, return RenderResult.
+    """
+    converter = html.VimWiki2Html('<string>', options or Options())
+    converter.check_assets = False
+    converter.wiki_contents = text
+    converter.parse()
+    return RenderResult(converter)
+
+
+def render_many(texts, options=None):
+    """
+    Convert every wiki text from the iterable, yield RenderResult for each
+    of them.
+    """
+    options = options or Options()
+    for text in texts:
+        yield render(text, options)
@@ -0,0 +1,284 @@
+"""
+Registry of the files to be copied to the output directory - local files
+referenced by the pages, stylesheets, scripts and their assets referenced by
+the templates. Files are collected from all the pages during the build, and
+copied once, after the conversion, so that the file referenced by hundreds of
+pages is copied only once, and workers are not racing on the same
+destination.
+
+Files can be published to the output directory in one of the modes:
+
+- copy - regular copy, using copy_file_range where available,
+- hardlink - hard link to the source file, which takes no space nor time,
+  but source and output directory have to be on the same filesystem,
+- symlink - symbolic link to the source file,
+- reflink - copy-on-write clone of the source file (FICLONE), which shares
+  the data blocks with the source until either of them is modified,
+  supported on Linux by filesystems like Btrfs, XFS and bcachefs,
+- auto - reflink if possible, copy otherwise.
+
+If hardlink or reflink cannot be made (i.e. source and output directory are
+on different filesystems, or filesystem doesn't support it), file is copied
+instead.
+
+Files are published by the pool of threads as soon as they are registered,
+so that copying is done while the pages are still being converted.
+"""
+import concurrent.futures
+import contextlib
+import errno
+import logging
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from vw2html import manifest
+
+LOG = logging.getLogger()
+
+MODES = ('copy', 'hardlink', 'symlink', 'reflink', 'auto')
+# ioctl request for cloning the file, from linux/fs.h
+FICLONE = 0x40049409
+# errors meaning that link or clone is not possible for the file, and it has
+# to be copied
+FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY,
+                   errno.EOPNOTSUPP, errno.ENOSYS, errno.EMLINK}
+
+
+def is_up_to_date(source, dest):
+    """
+    Check if destination file has the same contents as the source. Files
+    are compared by size and modification time, and only if the latter
+    differs, by contents hash.
+    """
+    try:
+        src_stat = os.stat(source)
+        dest_stat = os.stat(dest)
+    except OSError:
+        return False
+
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if manifest.file_hash(source) != manifest.file_hash(dest):
+        return False
+
+    # contents are the same, copy the timestamp to avoid hashing next time
+    with contextlib.suppress(OSError):
+        shutil.copystat(source, dest)
+    return True
+
+
+def copy(source, dest):
+    """
+    Copy file contents and metadata, using copy_file_range, so the copying is
+    done by the kernel (and possibly offloaded to the filesystem), falling
+    back to regular copy.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source, 'rb') as src, open(dest, 'wb') as dst:
+                while os.copy_file_range(src.fileno(), dst.fileno(),
+                                         2 ** 30):
+                    pass
+            shutil.copystat(source, dest)
+            return  # noqa: TRY300
+        except OSError as exc:
+            if exc.errno not in FALLBACK_ERRNOS:
+                raise
+    shutil.copy2(source, dest)
+
+
+def reflink(source, dest):
+    """
+    Clone source file to dest, sharing the data blocks between them.
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+    try:
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(dest)
+        raise
+    shutil.copystat(source, dest)
+
+
+def hardlink(source, dest):
+    os.link(source, dest)
+
+
+def symlink(source, dest):
+    os.symlink(os.path.abspath(source), dest)
+
+
+class Registry:
+    """
+    Map of the destination paths to the source paths, together with the
+    pages (owners) referencing them. Files are published using the provided
+    mode, by the pool of provided number of threads, or by the caller of
+    copy() if jobs is 0.
+    """
+    # number of files waiting for publishing per thread, after which adding
+    # new files blocks
+    pending_per_job = 8
+
+    def __init__(self, mode='copy', jobs=0):
+        if mode not in MODES:
+            msg = f"Unknown asset mode `{mode}'"
+            raise ValueError(msg)
+        self.mode = mode
+        self.jobs = jobs
+        self._files = {}
+        self._owners = {}
+        self._futures = {}
+        self._pool = None
+        self._pending = None
+        self._dirs = set()
+        # modes, which turned out to be not supported
+        self._unsupported = set()
+
+    def __len__(self):
+        return len(self._files)
+
+    def add(self, source, dest, owner=None):
+        """
+        Register source file to be copied to dest, and start publishing it
+        in the background. Owner is an identifier of the page referencing the
+        file, or None for files used by the templates.
+        """
+        dest = os.path.normpath(dest)
+        if dest not in self._files:
+            self._files[dest] = source
+            self._owners[dest] = set()
+            if self.jobs:
+                self._submit(source, dest)
+        self._owners[dest].add(owner)
+
+    def copy(self):
+        """
+        Wait for all registered files to be published, skipping those which
+        are up to date, and clear the registry. Return list of the
+        destination path, error message and set of the owners for every file
+        which couldn't be published.
+        """
+        failed = []
+        copied = 0
+        for dest, source in self._files.items():
+            future = self._futures.get(dest)
+            try:
+                if future:
+                    copied += future.result()
+                else:
+                    copied += self._publish_file(source, dest)
+            except OSError as exc:
+                error = exc.strerror or str(exc)
+                LOG.error("Cannot copy `%s' to `%s': %s", source, dest,  # noqa: TRY400
+                          error)
+                failed.append((dest, error, self._owners[dest]))
+
+        LOG.info("Copied %s of %s file(s) to the output directory", copied,
+                 len(self._files))
+        self._close()
+        return failed
+
+    def cancel(self):
+        """
+        Stop publishing files, which are not started yet, and clear the
+        registry.
+        """
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+        self._close()
+
+    def _submit(self, source, dest):
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                self.jobs, thread_name_prefix='vw2html-assets')
+            self._pending = threading.BoundedSemaphore(self.jobs *
+                                                       self.pending_per_job)
+        self._pending.acquire()
+        future = self._pool.submit(self._publish_file, source, dest)
+        future.add_done_callback(lambda _: self._pending.release())
+        self._futures[dest] = future
+
+    def _close(self):
+        if self._pool:
+            self._pool.shutdown()
+        self._pool = None
+        self._pending = None
+        self._files = {}
+        self._owners = {}
+        self._futures = {}
+        self._dirs = set()
+        # support might differ for files published in the next build
+        self._unsupported = set()
+
+    def _publish_file(self, source, dest):
+        """
+        Publish the file, unless it's up to date. Return 1 if file was
+        published, 0 otherwise.
+        """
+        if self._is_published(source, dest):
+            return 0
+        dirname = os.path.dirname(dest)
+        if dirname not in self._dirs:
+            os.makedirs(dirname, exist_ok=True)
+            self._dirs.add(dirname)
+        self._publish(source, dest)
+        return 1
+
+    def _is_published(self, source, dest):
+        """
+        Check if dest is already published with the current mode.
+        """
+        if self.mode == 'symlink':
+            try:
+                return os.readlink(dest) == os.path.abspath(source)
+            except OSError:
+                return False
+        try:
+            symlinked = os.path.islink(dest)
+            hardlinked = not symlinked and os.path.samefile(source, dest)
+        except OSError:
+            return False
+        if self.mode == 'hardlink' and 'hardlink' not in self._unsupported:
+            return hardlinked
+        # file published with other mode than the current one
+        if symlinked or hardlinked:
+            return False
+        return is_up_to_date(source, dest)
+
+    def _publish(self, source, dest):
+        """
+        Publish the file with the current mode. Existing destination is
+        removed first, so that neither source file is overwritten through
+        the link, nor the link is followed.
+        """
+        if os.path.lexists(dest):
+            os.unlink(dest)
+
+        mode = 'reflink' if self.mode == 'auto' else self.mode
+        if mode == 'symlink':
+            symlink(source, dest)
+            return
+        if mode in ('hardlink', 'reflink') and mode not in self._unsupported:
+            try:
+                (hardlink if mode == 'hardlink' else reflink)(source, dest)
+                return  # noqa: TRY300
+            except OSError as exc:
+                if exc.errno not in FALLBACK_ERRNOS:
+                    raise
+                # don't try again for the rest of the files
+                self._unsupported.add(mode)
+                if self.mode != 'auto':
+                    LOG.warning("Cannot %s `%s', copying files instead: %s",
+                                mode, source, exc.strerror)
+        copy(source, dest)
@@ -1,21 +1,32 @@
 import argparse
+import contextlib
+import heapq
 import logging
-import multiprocessing
 import os
 import re
-import shutil
+import signal
 import sys
+import threading
+import time
 import tomllib
 import xml.dom.minidom
 import xml.parsers.expat
 
 import vw2html
+import vw2html.executor
+import vw2html.scan
+import vw2html.watch
+from vw2html import assets, manifest, profiling
 
 LOG = logging.getLogger()
 XDG_CONFIG_HOME = os.getenv('XDG_CONFIG_HOME',
                                 os.path.expanduser('~/.config'))
 CONF_PATH = os.path.join(XDG_CONFIG_HOME, 'vw2html.toml')
 RE_CSS_URL = re.compile(r'url\([\'"]?([^\'")]*?)[\'"]?\)')
+RE_TEMPLATE_PLACEHOLDER = re.compile(r'%(content|root_path|title|css|date)%')
+# Estimated conversion speed in bytes per second, used for scheduling pages,
+# which conversion time is not known yet.
+CONVERSION_RATE = 2 * 1024 * 1024
 
 
 def abspath(path: str) -> str:
@@ -50,6 +61,136 @@ def get_script_link_paths(elem):
         ret_elems.extend(get_script_link_paths(child))
     return ret_elems
 
+
+class PageTimeoutError(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def _time_budget(seconds):
+    """
+    Raise PageTimeoutError in case of code within the context runs longer
+    than provided number of seconds. Time budget can be enforced only in the
+    main thread on systems with SIGALRM, otherwise it's ignored.
+    """
+    if (not seconds or not hasattr(signal, 'setitimer') or
+            threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def handler(signum, frame):  # noqa: ARG001
+        raise PageTimeoutError
+
+    old_handler = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)
+
+
+def _write_file(fname, contents):
+    """
+    Write contents to the file through the temporary file, so that the file
+    is replaced as a whole, and never left truncated, i.e. when the page
+    timeout is exceeded during writing.
+    """
+    tmp_fname = f'{fname}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_fname, 'w') as fobj:
+            fobj.write(contents)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_fname)
+        raise
+
+
+class Progress:
+    """
+    Display number of converted pages, conversion speed and estimated time
+    of finishing in a single line on stderr.
+    """
+    # minimal time in seconds between the line updates
+    interval = 0.1
+
+    def __init__(self, total, stream=None):
+        self.total = total
+        self.count = 0
+        self.stream = stream or sys.stderr
+        self._start = time.perf_counter()
+        self._last_update = 0
+
+    def track(self, iterable):
+        """
+        Pass through the items from iterable, updating progress with each of
+        them.
+        """
+        for item in iterable:
+            self.count += 1
+            now = time.perf_counter()
+            if now - self._last_update >= self.interval:
+                self._last_update = now
+                self.stream.write('\r\033[K' + self.get_line(now))
+                self.stream.flush()
+            yield item
+        self.stream.write('\r\033[K')
+        self.stream.flush()
+
+    def get_line(self, now):
+        elapsed = now - self._start
+        rate = self.count / elapsed if elapsed else 0
+        eta = '-:--:--'
+        if rate:
+            seconds = round((self.total - self.count) / rate)
+            eta = (f'{seconds // 3600}:{seconds // 60 % 60:02}:'
+                   f'{seconds % 60:02}')
+        width = len(str(self.total))
+        return (f'[{self.count:{width}}/{self.total}] {rate:.1f} pages/s, '
+                f'ETA {eta}')
+
+
+class Template:
+    """
+    Template compiled into the literal segments and placeholders, so that
+    the page is assembled with a single join. %css% placeholder is replaced
+    during compilation, as it's the same for every page.
+    """
+    def __init__(self, contents, css=None):
+        self.contents = contents
+        self._segments = []
+        # pairs of segment index and the placeholder name
+        self._placeholders = []
+        for index, part in enumerate(RE_TEMPLATE_PLACEHOLDER.split(contents)):
+            if index % 2 == 0:
+                self._segments.append(part)
+            elif part == 'css':
+                self._segments.append(css if css is not None else '%css%')
+            else:
+                self._placeholders.append((len(self._segments), part))
+                self._segments.append('')
+
+    def render(self, **values):
+        segments = self._segments.copy()
+        for index, name in self._placeholders:
+            segments[index] = values[name]
+        return ''.join(segments)
+
+
+# Converter used by the pool workers, set by the worker initializer.
+_WORKER_CONVERTER = None
+
+
+def _init_worker(converter):
+    global _WORKER_CONVERTER  # noqa: PLW0603
+    _WORKER_CONVERTER = converter
+
+
+def _convert_in_worker(filepaths):
+    return [_WORKER_CONVERTER._convert(x) for x in filepaths]  # noqa: SLF001
+
+
 class VimWiki2HTMLConverter:
     """
     Read commandline arguments from argparse, read and merge them with config
@@ -76,10 +217,40 @@ class VimWiki2HTMLConverter:
     # processors, but for debugging it might be better to turn it off and make
     # conversion sequentially
     convert_async: bool = True
+    # number of pages converted in parallel, 0 means number of CPUs
+    jobs: int = 0
+    # executor used for conversion, one of: auto, processes, threads,
+    # interpreters, sequential. Auto will use threads on free-threaded
+    # python, processes otherwise.
+    executor: str = 'auto'
+    # if estimated conversion time (in seconds) of the pages is lower than
+    # this value, pages will be converted in the current process, since it
+    # would be faster than starting the workers.
+    sequential_threshold: float = 0.25
+    # maximum time in seconds for converting single page, 0 means no limit.
+    # Pages exceeding it are reported as failed. It's not enforced with
+    # threads and interpreters executors.
+    page_timeout: float = 0
+    # show conversion progress on stderr, if it is a terminal
+    progress: bool = True
+    # number of the slowest pages to report after conversion
+    slowest: int = 0
+    # path to the file for writing per phase profiling data
+    profile: str = None
     # skip toplevel headers for table of contents generation, by default
     # include all. If provided integer larger then 0, all the headers less and
     # equal for that value will be skipped
     skip_toc_level: int = 0
+    # how the files referenced by the pages and templates are published to
+    # the output directory, one of: copy, hardlink, symlink, reflink, auto.
+    # Auto will use reflink if filesystem supports it, copy otherwise.
+    asset_mode: str = 'auto'
+    # number of threads publishing the files to the output directory while
+    # pages are converted, 0 means publishing them after the conversion.
+    asset_jobs: int = 4
+    # patterns of the files and directories within the wiki root, which are
+    # not scanned for the wiki files. Output directory is always excluded.
+    exclude: list = ['.git', '.hg', '.svn', 'node_modules']  # noqa: RUF012
 
     # converter specific defaults
     # force recreate/convert all wiki files passed to the converter
@@ -104,15 +275,66 @@ class VimWiki2HTMLConverter:
                           'href="%root_path%%css%" /></head>'
                           '<body>%content%</body></html>')
         self._template_fname = None
-        self._sources = []
-        self.assets = []
+        # wiki files to convert, or None for scanning the wiki root
+        self._sources = None
+        self._manifest = None
+        self._deps_cache = {}
+        # compiled templates with the signature of the template file they
+        # are compiled from, by the template file name
+        self._templates = {}
+        # templates, which assets have been copied in current build
+        self._copied_templates = set()
+        # %root_path% values by the page directory
+        self._root_paths = {}
         self.update(args)
 
-    def update(self, args):  # noqa: PLR0912 C901
+    def __getstate__(self):
+        """
+        Pickle only the configuration needed for page conversion, without
+        the list of sources, assets and build state, which might be huge.
+        """
+        state = self.__dict__.copy()
+        for key in ('_sources', '_assets', '_manifest', '_deps_cache'):
+            state.pop(key, None)
+        state['_templates'] = {}
+        return state
+
+    def update(self, args):
         LOG.debug("Updating arguments")
-        # root path
-        self.path = args.root if args.root else self.path
-        self.path_html = args.output if args.output else self.path_html
+        self._update_paths(args)
+        self._update_template(args)
+        self._update_options(args)
+
+        # source file/dir
+        if args.source and os.path.isfile(args.source):
+            self._sources = [args.source]
+
+        self.copy_template_assets(self._template)
+
+        LOG.debug("Using configuration:\n"
+                  "  path: %s\n"
+                  "  path_html: %s\n"
+                  "  index: %s\n"
+                  "  ext: %s\n"
+                  "  template_path: %s\n"
+                  "  template_default: %s\n"
+                  "  template_ext: %s\n"
+                  "  css_name: %s\n"
+                  "  convert_async: %s\n"
+                  "  jobs: %s\n"
+                  "  executor: %s\n"
+                  "  asset_mode: %s\n", self.path, self.path_html,
+                  self.index, self.ext, self.template_path,
+                  self.template_default, self.template_ext, self.css_name,
+                  self.convert_async, self.jobs, self.executor,
+                  self.asset_mode)
+
+    def _update_paths(self, args):
+        """
+        Update and validate wiki root and output directory.
+        """
+        self.path = args.root or self.path
+        self.path_html = args.output or self.path_html
 
         if args.source and os.path.isdir(args.source) and not self.path:
             LOG.info("Assuming provided source directory `%s' is a path to "
@@ -144,7 +366,10 @@ class VimWiki2HTMLConverter:
         else:
             os.makedirs(self.path_html)
 
-        # template
+    def _update_template(self, args):
+        """
+        Find the template and the stylesheet.
+        """
         if not self.template_path:
             # assume, template path is the same as wiki path
             self.template_path = self.path
@@ -177,53 +402,104 @@ class VimWiki2HTMLConverter:
             LOG.info("No CSS file provided, will try to get one from the "
                      "template.")
 
-        # setting force flag
-        self.force = args.force if args.force else self.force
+    def _update_options(self, args):
+        """
+        Update build options - forcing, parallelism, reporting and assets.
+        """
+        self.force = args.force or self.force
+
+        # parallelism
+        self.jobs = args.jobs or self.jobs
+        self.executor = args.executor or self.executor
+        self.page_timeout = args.page_timeout or self.page_timeout
+        self.slowest = args.slowest or self.slowest
+        self.profile = args.profile or self.profile
+        try:
+            vw2html.executor.get_executor_class(self.executor, self.jobs)
+        except ValueError as exc:
+            LOG.error("%s", exc)  # noqa: TRY400
+            raise
 
-        # source file/dir
-        if args.source and os.path.isfile(args.source):
-            self._sources.append(args.source)
-        else:
-            self.scan_for_wiki_files()
+        # files to be copied to the output directory
+        self.asset_mode = args.asset_mode or self.asset_mode
+        try:
+            self._assets = assets.Registry(self.asset_mode, self.asset_jobs)
+        except ValueError as exc:
+            LOG.error("%s", exc)  # noqa: TRY400
+            raise
 
-        self.copy_template_assets(self._template)
+    def _apply_data_to_template(self, html_obj):
+        template = self.get_template(html_obj.template)
+        return template.render(content=html_obj.html,
+                               root_path=self._get_root_path(
+                                   html_obj.wiki_fname),
+                               title=html_obj.title, date=html_obj.date)
 
-        LOG.debug("Using configuration:\n"
-                  "  path: %s\n"
-                  "  path_html: %s\n"
-                  "  index: %s\n"
-                  "  ext: %s\n"
-                  "  template_path: %s\n"
-                  "  template_default: %s\n"
-                  "  template_ext: %s\n"
-                  "  css_name: %s\n"
-                  "  convert_async: %s\n", self.path, self.path_html,
-                  self.index, self.ext, self.template_path,
-                  self.template_default, self.template_ext, self.css_name,
-                  self.convert_async)
+    def _get_root_path(self, wiki_fname):
+        """
+        Return %root_path% for the page, which is computed once for every
+        directory.
+        """
+        dirname = os.path.dirname(wiki_fname)
+        root_path = self._root_paths.get(dirname)
+        if root_path is None:
+            # calculate %root_path% for nested in subdirectories content
+            relpath = os.path.relpath(dirname, start=self.path)
+            root_path = ''
+            if relpath != '.':
+                root_path = '../' * len(relpath.split('/'))
+            self._root_paths[dirname] = root_path
+        return root_path
+
+    def get_template(self, template=None):
+        """
+        Return compiled template for the page with provided %template
+        placeholder value. Template file is read and compiled only once,
+        unless it was changed in the meantime.
+        """
+        fname = self._get_template_fname(template)
+        signature = self._template
+        if fname:
+            try:
+                stat = os.stat(fname)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
 
-    def _apply_data_to_template(self, html_obj):
-        # calculate %root_path% for nested in subdirectories content
-        relpath = os.path.relpath(os.path.dirname(html_obj.wiki_fname),
-                                  start=self.path)
-        root_path = ''
-        if relpath != '.':
-            root_path = '../'.join(['' for _ in
-                                    range(len(relpath.split('/')) + 1)])
-
-        # read template
-        template = self.get_template_contents(html_obj.template)
-
-        # replace placeholders
-        html = template.replace('%content%', html_obj.html)
-        html = html.replace('%root_path%', root_path)
-        html = html.replace('%title%', html_obj.title)
-        if self.css_name:
-            html = html.replace('%css%', os.path.basename(self.css_name))
-        return html.replace('%date%', html_obj.date)
+        cached = self._templates.get(fname)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        contents = self._template
+        if fname:
+            try:
+                with open(fname) as fobj:
+                    contents = fobj.read()
+            except OSError:
+                LOG.error('Error loading template "%s", ignoring.',  # noqa: TRY400
+                          fname)
+        compiled = Template(contents, os.path.basename(self.css_name)
+                            if self.css_name else None)
+        self._templates[fname] = (signature, compiled)
+        return compiled
+
+    def _copy_used_template_assets(self, template):
+        """
+        Copy assets of the template from the %template placeholder, once in a
+        build. Assets of the default template are copied upfront.
+        """
+        path = abspath(os.path.join(self.template_path,
+                                    template + self.template_ext))
+        if path in self._copied_templates:
+            return
+        self._copied_templates.add(path)
+        if not os.path.exists(path):
+            LOG.error('Error loading template "%s", ignoring.', template)
+            return
+        if path != abspath(self._template_fname or ''):
+            self.copy_template_assets(self.get_template(template).contents)
 
     def get_template_contents(self, template=None):
-        template_content = ""
         if not any([template, self._template_fname and
                     os.path.exists(self._template_fname)]):
             return self._template
@@ -233,9 +509,7 @@ class VimWiki2HTMLConverter:
                                 + self.template_ext)
             try:
                 with open(path) as fobj:
-                    template_content = fobj.read()
-                self.copy_template_assets(template_content)
-                return template_content  # noqa: TRY300
+                    return fobj.read()
             except OSError:
                 LOG.error('Error loading template "%s", ignoring.',  # noqa: TRY400
                           template)
@@ -252,7 +526,7 @@ class VimWiki2HTMLConverter:
         # failsafe, if no other templates are around
         return self._template
 
-    def copy_template_assets(self, template_content):  # noqa: PLR0915 PLR0912 C901
+    def copy_template_assets(self, template_content):  # noqa: PLR0912 C901
         """
         Analyse template file contents in context of stylesheets and
         javascript files and copy them with all their assets to destination
@@ -278,9 +552,8 @@ class VimWiki2HTMLConverter:
 
         if os.path.exists(os.path.join(self.path, 'favicon.ico')):
             src_fname = abspath(os.path.join(self.path, 'favicon.ico'))
-            outdir = self.path_html
-            os.makedirs(outdir, exist_ok=True)
-            shutil.copy(src_fname, outdir)
+            self._assets.add(src_fname, os.path.join(self.path_html,
+                                                     'favicon.ico'))
 
         assets = []
         paths = get_script_link_paths(dom)
@@ -307,9 +580,8 @@ class VimWiki2HTMLConverter:
                 LOG.warning("File `%s' doesn't exists, ignoring", src_fname)
                 continue
 
-            outdir = os.path.join(self.path_html, dirname)
-            os.makedirs(outdir, exist_ok=True)
-            shutil.copy(src_fname, outdir)
+            self._assets.add(src_fname, os.path.join(
+                self.path_html, dirname, os.path.basename(src_fname)))
 
             with open(src_fname) as fobj:
                 contents = fobj.read()
@@ -337,10 +609,9 @@ class VimWiki2HTMLConverter:
             if not os.path.exists(src_fname):
                 LOG.debug("Asset file %s doesn't exists", src_fname)
                 continue
-            outdir = os.path.join(self.path_html, dirname)
-            os.makedirs(outdir, exist_ok=True)
-            LOG.debug("Copying asset %s to %s", src_fname, outdir)
-            shutil.copy(src_fname, outdir)
+            LOG.debug("Adding asset %s", src_fname)
+            self._assets.add(src_fname, os.path.join(
+                self.path_html, dirname, os.path.basename(asset)))
 
     def convert(self):
         # copy css file
@@ -350,72 +621,404 @@ class VimWiki2HTMLConverter:
             # NOTE: assets from css file will be copied during either after
             # resolving default template and on custom one from %template
             # placeholder
-            shutil.copy(self.css_name, self.path_html)
-
-        # run conversion sequentially
-        if not self.convert_async:
-            LOG.info("Running conversion sequentially")
-            for filepath in self._sources:
-                self._convert(filepath)
+            self._add_stylesheet()
+
+        self._manifest = manifest.Manifest(self.path_html, self.asset_mode)
+        self._manifest.load()
+        self._deps_cache = {}
+        self._copied_templates = set()
+        sources = [x for x in self._iter_sources() if self.force or
+                   self._manifest.is_stale(self._get_manifest_key(x), x,
+                                           self._get_html_path(x),
+                                           self._get_dependencies)]
+        start = time.perf_counter()
+        if sources:
+            weights = self._get_weights(sources)
+            try:
+                if sum(weights.values()) < self.sequential_threshold:
+                    LOG.info("Running conversion in the current process")
+                    results = self._convert_all(sources, weights)
+                else:
+                    with self._get_executor() as executor:
+                        results = self._convert_all(sources, weights,
+                                                    executor)
+            except KeyboardInterrupt:
+                LOG.error("Interrupted, conversion is not complete")  # noqa: TRY400
+                self._assets.cancel()
+                return 1
+            LOG.info("Converted %s file(s) in %.3fs", len(sources),
+                     time.perf_counter() - start)
+        else:
+            LOG.info("All files are up to date")
+            self._manifest.save()
+            results = []
+
+        # profile is written even if there was nothing to convert, so that
+        # no-op builds can be measured as well
+        profile = profiling.Profile() if self.profile else profiling.NULL
+        with profile.phase('copy_assets'):
+            copy_failed = self._copy_assets()
+        if self.slowest and results:
+            self._report_slowest(results)
+        if self.profile:
+            self._save_profile(results, time.perf_counter() - start,
+                               profile.phases)
+        failed = self._report_failures(results)
+        return 2 if failed or copy_failed else 0
+
+    def _add_stylesheet(self):
+        self._assets.add(self.css_name, os.path.join(
+            self.path_html, os.path.basename(self.css_name)))
+
+    def _copy_assets(self):
+        """
+        Wait for the files registered during the build to be copied to the
+        output directory, and log those which failed. Pages referencing
+        them are removed from the manifest, so that they will be converted
+        again next time. Return number of failures.
+        """
+        failed = self._assets.copy()
+        if not failed:
             return 0
+        LOG.error("Copying of %s file(s) failed:", len(failed))
+        for dest, error, owners in sorted(failed, key=lambda x: x[0]):
+            LOG.error("  %s: %s", os.path.relpath(dest, self.path_html),
+                      error)
+            for key in owners:
+                if key is not None:
+                    self._manifest.remove(key)
+        self._manifest.save()
+        return len(failed)
+
+    def _report_failures(self, results):
+        """
+        Log failed conversions, return number of failures.
+        """
+        failed = [x for x in results if x['error']]
+        if not failed:
+            return 0
+        LOG.error("Conversion of %s file(s) failed:", len(failed))
+        for result in sorted(failed, key=lambda x: x['path']):
+            LOG.error("  %s: %s", self._get_manifest_key(result['path']),
+                      result['error'])
+        return len(failed)
 
-        # or use async pool
-        LOG.info("Running conversion concurrently")
+    def _save_profile(self, results, duration, phases=None):
+        """
+        Write phases of all the pages, together with the phases of the build
+        itself, to the profile file.
+        """
+        profile = profiling.Profile()
+        for result in results:
+            profile.merge(result['profile'])
+        profile.merge(phases or {})
         try:
-            with multiprocessing.Pool() as p:
-                try:
-                    result = p.map_async(self._convert, tuple(self._sources))
-                    result.get(10)  # wait up to ten seconds for convertion
-                                    # to finish
-
-                except multiprocessing.context.TimeoutError:
-                    LOG.error("Processing files took abnormally long, still "  # noqa: TRY400
-                              "trying to finish the process, you might use "
-                              "Ctrl+C to abort the conversion")
-                    wait_time = 1
-                    while True:
-                        try:
-                            result.get(wait_time)
-                            break
-                        except multiprocessing.context.TimeoutError:
-                            wait_time *= 2
-                            LOG.error("Still trying… waiting another %s "  # noqa: TRY400
-                                      "seconds", wait_time)
-                            continue
-            return 0  # noqa: TRY300
+            profile.save(self.profile, pages=len(results),
+                         wall_time=round(duration, 6))
+        except OSError as exc:
+            LOG.error("Cannot write profile `%s': %s", self.profile,  # noqa: TRY400
+                      exc.strerror)
+            return
+        LOG.info("Profile written to `%s'", self.profile)
+
+    def _report_slowest(self, results):
+        slowest = heapq.nlargest(self.slowest, results,
+                                 key=lambda x: x['time'])
+        # report is requested explicitly, so it goes to stdout regardless of
+        # the verbosity level
+        lines = [f"{len(slowest)} slowest page(s):"]
+        lines.extend(f"  {x['time']:8.3f}s  "
+                     f"{self._get_manifest_key(x['path'])}" for x in slowest)
+        sys.stdout.write('\n'.join(lines) + '\n')
+
+    def _get_executor(self):
+        """
+        Return executor, which workers get the converter configuration once,
+        on their start, so that tasks carry only the page paths.
+        """
+        name = self.executor if self.convert_async else 'sequential'
+        executor_class = vw2html.executor.get_executor_class(name, self.jobs)
+        executor = executor_class(self.jobs, _init_worker, (self,))
+        LOG.info("Running conversion using %s executor with %s worker(s)",
+                 executor.name, executor.jobs)
+        if self.page_timeout and executor.name in ('threads',
+                                                   'interpreters'):
+            LOG.warning("Page timeout is not enforced with %s executor",
+                        executor.name)
+        return executor
+
+    def _get_weights(self, sources):
+        """
+        Return estimated conversion time for each of the sources, taken from
+        the build manifest, or calculated out of file size for the pages
+        which were not converted yet.
+        """
+        rate = CONVERSION_RATE
+        known = [x for x in self._manifest.pages.values() if x.get('time')]
+        if known:
+            rate = (sum(x['size'] for x in known) /
+                    sum(x['time'] for x in known)) or rate
+
+        weights = {}
+        for filepath in sources:
+            entry = self._manifest.pages.get(self._get_manifest_key(filepath))
+            if entry and entry.get('time'):
+                weights[filepath] = entry['time']
+                continue
+            try:
+                weights[filepath] = os.stat(filepath).st_size / rate
+            except OSError:
+                weights[filepath] = 0
+        return weights
+
+    def _get_chunks(self, weights, jobs):
+        """
+        Split sources into chunks, longest first. Each chunk holds pages,
+        which estimated conversion time sums up to more or less the same
+        value, so that long running pages are scheduled alone at the
+        beginning, and a lot of small ones are send to the workers together.
+        """
+        target = sum(weights.values()) / (jobs * 4)
+        chunks = []
+        chunk = []
+        chunk_weight = 0
+        for filepath in sorted(weights, key=weights.get, reverse=True):
+            if chunk and chunk_weight + weights[filepath] > target:
+                chunks.append(chunk)
+                chunk = []
+                chunk_weight = 0
+            chunk.append(filepath)
+            chunk_weight += weights[filepath]
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _convert_all(self, sources, weights, executor=None):
+        """
+        Convert provided wiki files using provided executor, or directly if
+        there is none, and update the build manifest. Return list of the
+        conversion results.
+        """
+        if not executor:
+            return self._update_manifest((self._convert(x) for x in sources),
+                                         len(sources))
+
+        chunks = self._get_chunks(weights, executor.jobs)
+        LOG.debug("Scheduling %s file(s) in %s chunk(s)", len(sources),
+                  len(chunks))
+        results = executor.imap_unordered(_convert_in_worker, chunks)
+        return self._update_manifest((result for chunk in results
+                                      for result in chunk), len(sources))
+
+    def watch(self):
+        """
+        Convert the wiki, and than keep watching it for the changes,
+        converting changed wiki files, pages which use changed templates and
+        stylesheet, and copying changed assets.
+        """
+        retval = self.convert()
+        if retval:
+            return retval
+
+        watcher = vw2html.watch.get_watcher(self.path,
+                                            exclude=[self.path_html],
+                                            patterns=self.exclude)
+        LOG.warning("Watching `%s' for changes, press Ctrl+C to stop",
+                    self.path)
+        executor = self._get_executor()
+        try:
+            while True:
+                changed = watcher.wait()
+                start = time.perf_counter()
+                if changed is None:
+                    changed = set(self._iter_sources())
+                self._process_changes(changed, executor)
+                LOG.info("Changes processed in %.3fs",
+                         time.perf_counter() - start)
         except KeyboardInterrupt:
-            LOG.error("Interrupted, conversion is not complete")  # noqa: TRY400
-            return 1
+            LOG.info("Stopped watching `%s'", self.path)
+            return 0
+        finally:
+            watcher.close()
+            executor.close()
+
+    def _process_changes(self, changed, executor=None):  # noqa: C901
+        """
+        Convert changed wiki files and those which depends on changed
+        templates or stylesheet, and copy changed assets which already have
+        been published to the output directory.
+        """
+        self._deps_cache = {}
+        self._copied_templates = set()
+        changed = {abspath(x) for x in changed}
+        sources = set()
+
+        for path in changed:
+            if (not os.path.exists(path) or
+                    vw2html.scan.is_excluded(self.path, path, self.exclude)):
+                continue
+            if path.endswith(self.ext):
+                sources.add(path)
+                continue
+            if path == abspath(self.css_name or ''):
+                self._add_stylesheet()
+                continue
+            if path.endswith(self.template_ext):
+                if path == abspath(self._template_fname or ''):
+                    self._template = self.get_template_contents()
+                try:
+                    with open(path) as fobj:
+                        self.copy_template_assets(fobj.read())
+                except OSError as exc:
+                    LOG.warning("Cannot read template `%s': %s", path,
+                                exc.strerror)
+                    continue
+                self._copied_templates.add(path)
+                continue
+            dest = os.path.join(self.path_html, self._get_manifest_key(path))
+            if os.path.exists(dest):
+                LOG.info("Copying changed asset %s", path)
+                self._assets.add(path, dest)
+
+        for key, entry in self._manifest.pages.items():
+            if changed.intersection(abspath(x) for x in entry['deps'] if x):
+                sources.add(abspath(os.path.join(self.path, key)))
+
+        sources = [x for x in sources if self.force or
+                   self._manifest.is_stale(self._get_manifest_key(x), x,
+                                           self._get_html_path(x),
+                                           self._get_dependencies)]
+        if sources:
+            LOG.info("Converting %s", ', '.join(self._get_manifest_key(x)
+                                                for x in sources))
+            weights = self._get_weights(sources)
+            if sum(weights.values()) < self.sequential_threshold:
+                executor = None
+            self._report_failures(self._convert_all(sources, weights,
+                                                    executor))
+        self._copy_assets()
 
     def _convert(self, filepath):
+        """
+        Convert single file. Any error, or exceeding the page timeout, will
+        not break the whole conversion, but will be reported in the result.
+        """
         LOG.debug("Processing file %s", filepath)
-        wiki_obj = vw2html.html.VimWiki2Html(filepath, self)
-        source_mtime = 1
-        dest_mtime = 0
+        start = time.perf_counter()
+        result = {'path': filepath, 'nohtml': False, 'template': None,
+                  'assets': [], 'error': None, 'profile': {}}
+        profile = profiling.Profile() if self.profile else profiling.NULL
         try:
-            source_mtime = os.stat(filepath).st_mtime
-            dest_mtime = os.stat(wiki_obj.html_fname).st_mtime
-        except OSError:
-            pass
-
-        if (source_mtime > dest_mtime) or self.force:
-            # convert only when:
-            # - conversion is forced
-            # - source modify time is newer then destination
-            wiki_obj.convert()
-            with open(wiki_obj.html_fname, 'w') as fobj:
-                fobj.write(self._apply_data_to_template(wiki_obj))
-
-        return 0
+            with _time_budget(self.page_timeout):
+                wiki_obj = vw2html.html.VimWiki2Html(filepath, self, profile)
+                wiki_obj.convert(copy_assets=False)
+                result['nohtml'] = wiki_obj.nohtml
+                result['assets'] = list(dict.fromkeys(wiki_obj.assets))
+                if not wiki_obj.nohtml:
+                    result['template'] = wiki_obj.template
+                    with profile.phase('_apply_data_to_template'):
+                        html = self._apply_data_to_template(wiki_obj)
+                    html_fname = wiki_obj.html_fname
+                    with profile.phase('write'):
+                        os.makedirs(os.path.dirname(html_fname),
+                                    exist_ok=True)
+                        _write_file(html_fname, html)
+        except PageTimeoutError:
+            result['error'] = (f"timed out after {self.page_timeout} "
+                               f"second(s)")
+        except Exception as exc:
+            result['error'] = f"{type(exc).__name__}: {exc}"
+            # failures are reported after the conversion
+            LOG.debug("Conversion of `%s' failed", filepath, exc_info=True)
+        result['time'] = time.perf_counter() - start
+        if self.profile:
+            result['profile'] = profile.phases
+        return result
+
+    def _get_manifest_key(self, filepath):
+        return os.path.relpath(abspath(filepath), start=abspath(self.path))
+
+    def _get_html_path(self, filepath):
+        return os.path.join(self.path_html, os.path.splitext(
+            self._get_manifest_key(filepath))[0] + '.html')
+
+    def _get_template_fname(self, template=None):
+        """
+        Return path to the template file, which will be used for the page
+        with provided %template placeholder value, or None in case of
+        builtin template.
+        """
+        if template:
+            path = os.path.join(self.template_path, template +
+                                self.template_ext)
+            if os.path.exists(path):
+                return path
+        if self._template_fname and os.path.exists(self._template_fname):
+            return self._template_fname
+        return None
+
+    def _get_dependencies(self, template=None):
+        """
+        Return hashes of the files, other than page source, which have impact
+        on the page generated with provided template - the template itself
+        and the stylesheet in case template make use of %css% placeholder.
+        """
+        fname = self._get_template_fname(template)
+        if fname not in self._deps_cache:
+            contents = self._template
+            if fname:
+                try:
+                    with open(fname) as fobj:
+                        contents = fobj.read()
+                except OSError:
+                    contents = ''
+            deps = {fname or '': manifest.text_hash(contents)}
+            if self.css_name and '%css%' in contents:
+                deps[self.css_name] = manifest.file_hash(self.css_name)
+            self._deps_cache[fname] = deps
+        return self._deps_cache[fname]
+
+    def _update_manifest(self, results, total):
+        """
+        Update manifest with conversion results as they come, showing the
+        progress if enabled. Return list of all the results.
+        """
+        if self.progress and sys.stderr.isatty() and LOG.isEnabledFor(
+                logging.WARNING):
+            results = Progress(total).track(results)
+
+        processed = []
+        for result in results:
+            processed.append(result)
+            key = self._get_manifest_key(result['path'])
+            if result['error']:
+                self._manifest.remove(key)
+                continue
+            if result['template']:
+                self._copy_used_template_assets(result['template'])
+            for path in result['assets']:
+                self._assets.add(os.path.join(self.path, path),
+                                 os.path.join(self.path_html, path), key)
+            self._manifest.add(key, result['path'],
+                               self._get_dependencies(result['template']),
+                               nohtml=result['nohtml'],
+                               template=result['template'],
+                               duration=result['time'])
+        self._manifest.save()
+        return processed
 
     def scan_for_wiki_files(self):
-        for root, _, files in os.walk(self.path):
-            for fname in files:
-                _fname = os.path.join(root, fname)
-                if _fname.endswith(self.ext):
-                    self._sources.append(_fname)
-                else:
-                    self.assets.append(_fname)
+        """
+        Yield wiki files found in the wiki root, skipping the output
+        directory and excluded files and directories.
+        """
+        return vw2html.scan.scan(self.path, self.ext, [self.path_html],
+                                 self.exclude)
+
+    def _iter_sources(self):
+        if self._sources is not None:
+            return iter(self._sources)
+        return self.scan_for_wiki_files()
 
     def read_config(self, config_file, source):  # noqa: PLR0912 C901
         if not os.path.exists(config_file):
@@ -444,7 +1047,10 @@ class VimWiki2HTMLConverter:
         legal_keys = ["css_name", "ext", "index", "path_html",
                       "template_default", "template_default", "template_ext",
                       "template_path", 'path', 'force', 'convert_async',
-                      'skip_toc_level']
+                      'jobs', 'executor', 'sequential_threshold',
+                      'page_timeout', 'progress', 'slowest',
+                      'skip_toc_level', 'asset_mode', 'asset_jobs',
+                      'exclude']
 
         conf_dict = {}
         if potential_path:
@@ -559,6 +1165,25 @@ def parse_args():
                         "will skip loading confoguration")
     parser.add_argument('-f', '--force', action='store_true', help="Convert "
                         "all files even if source seems unchanged")
+    parser.add_argument('-w', '--watch', action='store_true', help="Keep "
+                        "watching wiki directory and convert files as they "
+                        "change")
+    parser.add_argument('-j', '--jobs', type=int, help="Number of pages "
+                        "converted in parallel, defaults to number of CPUs")
+    parser.add_argument('--page-timeout', type=float, help="Maximum time "
+                        "in seconds for converting single page")
+    parser.add_argument('-e', '--executor',
+                        choices=vw2html.executor.EXECUTORS, help="Executor "
+                        "used for conversion, 'auto' by default")
+    parser.add_argument('--asset-mode', choices=assets.MODES, help="How "
+                        "files referenced by pages and templates are "
+                        "published to the output directory, 'auto' by "
+                        "default")
+    parser.add_argument('--profile', metavar='FILE', help="Write time "
+                        "and number of calls for every conversion phase, "
+                        "summed up for all the pages, to FILE as JSON")
+    parser.add_argument('--slowest', type=int, metavar='N', help="Report N "
+                        "pages which took the longest to convert")
 
     args = parser.parse_args()
     logging.basicConfig(level=get_verbose(args.verbose, args.quiet),
@@ -577,6 +1202,8 @@ def main():
         converter = VimWiki2HTMLConverter(args)
     except ValueError:
         return 4
+    if args.watch:
+        return converter.watch()
     return converter.convert()
 
 
@@ -0,0 +1,417 @@
+"""
+Document tree of the parsed wiki page. VimWiki2Html produces the tree once,
+and it can be rendered afterwards as many times as needed, kept in the cache
+or sent between processes, since nodes hold only plain data.
+
+Document consists of the sequence of blocks (headers, paragraphs, lists,
+tables, definition lists and plain lines) and the tables of inline spans
+(code blocks, inline codes, links and images). Blocks are referring to the
+spans by the marks put in their text. Paragraph and list boundaries are
+separate nodes, as vimwiki allows them to overlap with other blocks, i.e.
+table may be started in the middle of the paragraph.
+
+The tree is shallow and meant for html only. Inline markup is rendered while
+the line is parsed, so text of the blocks is html with the marks of the
+spans, and lists are a flat sequence of open, item and close nodes.
+
+All the nodes are using __slots__, so that even very large pages don't take
+much memory.
+"""
+import itertools
+import logging
+import re
+
+LOG = logging.getLogger()
+
+# marks are using Unicode Supplementary Private Use Area A in unicode from
+# the end of the set, there is low chance to fill those with custom
+# glyphs, and even so, the sentence of **4** (where asterisk is such
+# symbol and 4 represents any number) is pretty low to exists in written
+# wiki text.
+CODEBLOCK_MARK = "󿿽󿿽{}󿿽󿿽"
+INLINE_CODE_MARK = " 󿿼󿿼{}󿿼󿿼"
+LINKS_MARK = " 󿿻󿿻{}󿿻󿿻"
+IMAGES_MARK = "󿿺󿿺{}󿿺󿿺"
+TOC_MARK = " 󿿹󿿹󿿹󿿹"
+
+re_table_header_sep = re.compile(r'\s*?:?-+:?\s*')
+
+
+class Node:
+    """
+    Base class for the document nodes. Every node renders itself as a html
+    string.
+    """
+    __slots__ = ()
+
+    def render(self):
+        raise NotImplementedError
+
+
+# inline spans
+
+class Span(Node):
+    __slots__ = ('html',)
+
+    def __init__(self, html):
+        self.html = html
+
+    def render(self):
+        return self.html
+
+
+class CodeBlock(Span):
+    __slots__ = ()
+
+
+class InlineCode(Span):
+    __slots__ = ()
+
+
+class Link(Span):
+    """
+    Link with the target as it was written in the wiki.
+    """
+    __slots__ = ('target',)
+
+    def __init__(self, target, html):
+        super().__init__(html)
+        self.target = target
+
+
+class Image(Link):
+    __slots__ = ()
+
+
+# blocks
+
+class Text(Node):
+    """
+    Line of text rendered to html, which may contain marks.
+    """
+    __slots__ = ('html',)
+
+    def __init__(self, html):
+        self.html = html
+
+    def render(self):
+        return self.html
+
+
+class Header(Node):
+    __slots__ = ('id', 'level', 'title')
+
+    def __init__(self, level, id_, title):
+        self.level = level
+        self.id = id_
+        self.title = title
+
+    def render(self):
+        return (f'<h{self.level} id="{self.id}">'
+                f'<a href="#{self.id}">{self.title}</a>'
+                f'</h{self.level}>\n')
+
+
+class Rule(Node):
+    __slots__ = ()
+
+    def render(self):
+        return '<hr />'
+
+
+class ParagraphOpen(Node):
+    __slots__ = ()
+
+    def render(self):
+        return '<p>'
+
+
+class ParagraphClose(Node):
+    __slots__ = ()
+
+    def render(self):
+        return '</p>'
+
+
+class ListOpen(Node):
+    """
+    Start of the list together with its first item. Nested lists are
+    following in the same sequence of blocks.
+    """
+    __slots__ = ('css_class', 'list_type', 'text')
+
+    def __init__(self, list_type, css_class, text):
+        self.list_type = list_type
+        self.css_class = css_class
+        self.text = text
+
+    def render(self):
+        css_class = f' class="{self.css_class}"' if self.css_class else ''
+        return f"<{self.list_type}>\n<li{css_class}>\n{self.text}"
+
+
+class ListItem(Node):
+    """
+    Next item of the list, which closes the previous one.
+    """
+    __slots__ = ('css_class', 'text')
+
+    def __init__(self, css_class, text):
+        self.css_class = css_class
+        self.text = text
+
+    def render(self):
+        css_class = f' class="{self.css_class}"' if self.css_class else ''
+        return f'</li>\n<li{css_class}>\n{self.text}'
+
+
+class ListClose(Node):
+    """
+    End of the list together with its last item.
+    """
+    __slots__ = ('list_type',)
+
+    def __init__(self, list_type):
+        self.list_type = list_type
+
+    def render(self):
+        return f"</li>\n</{self.list_type}>\n"
+
+
+class Cell(Node):
+    __slots__ = ('align', 'colspan', 'header', 'rowspan', 'text')
+
+    def __init__(self, text):
+        self.rowspan = 1
+        self.colspan = 1
+        self.text = text
+        self.header = False
+        self.align = None
+
+    def render(self):
+        rspan = cspan = ''
+        if self.rowspan > 1:
+            rspan = f' rowspan="{self.rowspan}"'
+        if self.colspan > 1:
+            cspan = f' colspan="{self.colspan}"'
+        td = 'th' if self.header else 'td'
+        css_class = ''
+        if self.align:
+            css_class = f' class="cell-{self.align}"'
+        return f"<{td}{rspan}{cspan}{css_class}>{self.text}</{td}>"
+
+
+class Table(Node):
+    __slots__ = ('_align', 'centered', 'first_row_header', 'rows')
+
+    def __init__(self):
+        self.centered = False
+        self.rows = []
+        self.first_row_header = False
+        self._align = []
+
+    def render(self):
+        rows = self._scan_table()
+        html = ['<table class="center">' if self.centered else "<table>"]
+        index = 0
+        if self.first_row_header:
+            html.append('<thead>\n<tr>')
+            html.extend([cell.render() for cell in rows[0]])
+            html.append('</tr>\n</thead>')
+            index = 1
+
+        html.append('<tbody>')
+        for row in itertools.islice(rows, index, None):
+            html.append('<tr>')
+            html.extend([cell.render() for cell in row])
+            html.append('</tr>')
+        html.append('</tbody></table>')
+        return ''.join(html)
+
+    def add_rows(self, row_list):
+        if (len(self.rows) == 1 and
+                all(re_table_header_sep.match(x) for x in row_list)):
+            self.first_row_header = True
+            for row in row_list:
+                if row.strip().startswith(':') and row.strip().endswith(':'):
+                    self._align.append('center')
+                elif row.strip().endswith(':'):
+                    self._align.append('right')
+                else:
+                    self._align.append('left')
+            return
+        self.rows.append(row_list)
+
+    def _scan_table(self):
+        """
+        Return rows of cells. Cells merged into the neighbours with \\/ or >
+        are left out, and extend the span of the last cell above them in the
+        same column or the last cell before them in the same row.
+        """
+        table = []
+        # last cell in every column
+        columns = {}
+
+        for x, row in enumerate(self.rows):
+            cells = []
+            for y, item in enumerate(row):
+                alignment = None
+                if self._align:
+                    alignment = self._align[y]
+                item_ = item.strip()
+                if item_ == '\\/':
+                    if y in columns:
+                        columns[y].rowspan += 1
+                    continue
+
+                if item_ == '>':
+                    if cells:
+                        cells[-1].colspan += 1
+                    continue
+
+                c = Cell(item)
+                if alignment and alignment != 'left':
+                    c.align = alignment
+                if self.first_row_header and x == 0:
+                    c.header = True
+                cells.append(c)
+                columns[y] = c
+            table.append(cells)
+        return table
+
+
+class Definition(Node):
+    """
+    Definition made of paragraphs, every paragraph is kept as a list of its
+    lines.
+    """
+    __slots__ = ('_lines',)
+
+    def __init__(self, new_line=None):
+        self._lines = [[new_line]] if new_line else []
+
+    def append(self, item):
+        self._lines.append([item])
+
+    def add_to_line(self, item):
+        if not self._lines:
+            LOG.error('There is no lines in definition when expected')
+            return
+        self._lines[-1].append(item)
+
+    def render(self):
+        return ''.join([f'<p>{" ".join(p)}</p>\n' for p in self._lines])
+
+
+class DefinitionList(Node):
+    """
+    Definition list, kept as a sequence of the titles and definitions.
+    """
+    __slots__ = ('_definition', '_items', 'centered', 'indent')
+
+    def __init__(self):
+        self.centered = False
+        self._items = []
+        # last definition after the last title
+        self._definition = None
+        self.indent = None
+
+    def render(self):
+        html = ['<dl class="center">\n' if self.centered else "<dl>\n"]
+        for item in self._items:
+            if isinstance(item, Definition):
+                html.append(f"<dd>\n{item.render()}</dd>\n")
+            else:
+                html.append(f'<dt>{item}</dt>\n')
+        html.append('</dl>\n')
+        return ''.join(html)
+
+    def add_definition(self, title, def_):
+        if title:
+            self._items.append(title)
+            self._definition = None
+
+        if def_:
+            self._definition = Definition(def_)
+            self._items.append(self._definition)
+
+    def add_to_def(self, content, new_para):
+        if self._definition is None:
+            LOG.error('There is no definitions in current deflist')
+            return
+
+        if new_para:
+            self._definition.append(content)
+        else:
+            self._definition.add_to_line(content)
+
+
+class Document(Node):
+    """
+    Parsed wiki page - sequence of the blocks, spans referenced by marks in
+    them, and the table of contents.
+    """
+    __slots__ = ('blocks', 'code_blocks', 'images', 'inline_codes', 'links',
+                 'toc')
+
+    def __init__(self, blocks=None, *, code_blocks=None,  # noqa: PLR0913
+                 inline_codes=None, links=None, images=None, toc=None):
+        self.blocks = blocks if blocks is not None else []
+        self.code_blocks = code_blocks if code_blocks is not None else []
+        self.inline_codes = inline_codes if inline_codes is not None else []
+        self.links = links if links is not None else []
+        self.images = images if images is not None else []
+        self.toc = toc
+
+    def render(self):
+        """
+        Return html with all the marks replaced by the code blocks, inline
+        codes, links, images and table of contents. Marks are resolved in a
+        single pass.
+        """
+        html = '\n'.join([block.render() for block in self.blocks])
+        return re_marks.sub(self._resolve_mark, html)
+
+    def _resolve_mark(self, match):
+        kind = match.lastgroup
+        if kind == 'toc':
+            # empty table of contents, if there are no headers for it
+            contents = match[0] if self.toc is None else self.toc
+        else:
+            contents = {'codeblock': self.code_blocks,
+                        'inline_code': self.inline_codes,
+                        'link': self.links,
+                        'image': self.images}[kind][int(match[kind])].html
+        if kind in ('link', 'toc'):
+            # link descriptions and table of contents entries may contain
+            # inline codes, images or links themselves
+            contents = re_marks.sub(self._resolve_mark, contents)
+        return contents
+
+
+def render_nodes(nodes):
+    """
+    Return html of the nodes joined together.
+    """
+    return ''.join([node.render() for node in nodes])
+
+
+def _get_marks_regex():
+    """
+    Return regex matching every kind of the marks. Name of the matching group
+    is a kind of the mark, and its value is the index.
+    """
+    parts = []
+    for name, mark in (('codeblock', CODEBLOCK_MARK),
+                       ('inline_code', INLINE_CODE_MARK),
+                       ('link', LINKS_MARK),
+                       ('image', IMAGES_MARK)):
+        parts.append(re.escape(mark).replace(re.escape('{}'),
+                                             rf'(?P<{name}>\d+)'))
+    # leading space of the table of contents mark is lost, when the line
+    # is stripped, i.e. in the list item
+    parts.append(rf'(?P<toc> ?{re.escape(TOC_MARK.lstrip())})')
+    return re.compile('|'.join(parts))
+
+
+re_marks = _get_marks_regex()
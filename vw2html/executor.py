@@ -0,0 +1,135 @@
+"""
+Executors for running the page conversion. All of them provide the subset of
+multiprocessing.Pool interface used by the converter, so they can be used
+interchangeably:
+
+- processes - pool of worker processes, default on regular CPython builds,
+- threads - pool of threads, which make sense only on free-threaded CPython
+  (3.13+), where conversion can run on multiple cores without the need for
+  sending data between processes,
+- interpreters - pool of subinterpreters, available from Python 3.14,
+- sequential - conversion in the current process, one page after another.
+
+VimWiki2Html instances are never shared between the workers, and the only
+module level state used during conversion is compiled regular expressions,
+which are safe for concurrent use. Converter passed to the initializer is
+shared by the threads, which fill its template and %root_path% caches.
+Those are plain dicts, updated with single assignments, and the value
+computed for a key is always the same, so two threads racing on the same
+entry only do the work twice.
+"""
+import concurrent.futures
+import multiprocessing.pool
+import os
+import sys
+
+EXECUTORS = ('auto', 'processes', 'threads', 'interpreters', 'sequential')
+
+
+def is_free_threaded():
+    """
+    Check if interpreter is running without the GIL.
+    """
+    return not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+class Executor:
+    """
+    Base for the executors.
+    """
+    name = None
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def imap_unordered(self, func, iterable):
+        """
+        Return iterator over results of func called for every item, in the
+        order they are available.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ProcessExecutor(Executor):
+    name = 'processes'
+    pool_class = multiprocessing.pool.Pool
+
+    def __init__(self, jobs=None, initializer=None, initargs=()):
+        super().__init__(jobs)
+        self._pool = self.pool_class(self.jobs, initializer, initargs)
+
+    def imap_unordered(self, func, iterable):
+        return self._pool.imap_unordered(func, iterable)
+
+    def close(self):
+        self._pool.terminate()
+
+
+class ThreadExecutor(ProcessExecutor):
+    name = 'threads'
+    pool_class = multiprocessing.pool.ThreadPool
+
+
+class SequentialExecutor(Executor):
+    name = 'sequential'
+
+    def __init__(self, jobs=None, initializer=None, initargs=()):  # noqa: ARG002
+        super().__init__(1)
+        if initializer:
+            initializer(*initargs)
+
+    def imap_unordered(self, func, iterable):
+        return map(func, iterable)
+
+
+class InterpreterExecutor(Executor):
+    name = 'interpreters'
+
+    def __init__(self, jobs=None, initializer=None, initargs=()):
+        super().__init__(jobs)
+        self._executor = concurrent.futures.InterpreterPoolExecutor(
+            self.jobs, initializer=initializer, initargs=initargs)
+
+    def imap_unordered(self, func, iterable):
+        futures = [self._executor.submit(func, x) for x in iterable]
+        return (x.result() for x in
+                concurrent.futures.as_completed(futures))
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+def get_executor_class(name='auto', jobs=None):
+    """
+    Return executor class for provided name. For 'auto', select the best one
+    for current interpreter and number of jobs.
+    """
+    if name == 'auto':
+        if jobs == 1:
+            return SequentialExecutor
+        if is_free_threaded():
+            return ThreadExecutor
+        return ProcessExecutor
+
+    if name == 'interpreters':
+        if not hasattr(concurrent.futures, 'InterpreterPoolExecutor'):
+            msg = "Subinterpreters executor requires Python 3.14 or newer"
+            raise ValueError(msg)
+        return InterpreterExecutor
+
+    executors = {'processes': ProcessExecutor,
+                 'threads': ThreadExecutor,
+                 'sequential': SequentialExecutor}
+    if name not in executors:
+        msg = f"Unknown executor `{name}'"
+        raise ValueError(msg)
+    return executors[name]
@@ -10,6 +10,8 @@ import os
 import re
 import shutil
 
+from vw2html import document, profiling
+
 try:
     import pygments
     import pygments.formatters
@@ -23,195 +25,22 @@ LOG = logging.getLogger()
 
 
 class List:
+    """
+    Opened list, with the width of its indentation.
+    """
+    __slots__ = ('indent', 'list_type')
+
     def __init__(self, indent, list_type='ul'):
         self.list_type = list_type
         self.indent = indent
 
-    def __lt__(self, other):
-        return len(self.indent) < len(other.indent)
-
-    def __le__(self, other):
-        return len(self.indent) <= len(other.indent)
-
-    def __eq__(self, other):
-        return len(self.indent) == len(other.indent)
-
-    def __ne__(self, other):
-        return len(self.indent) != len(other.indent)
-
-    def __gt__(self, other):
-        return len(self.indent) > len(other.indent)
-
-    def __ge__(self, other):
-        return len(self.indent) >= len(other.indent)
-
-    __hash__ = object.__hash__
-
-
-class Cell:
-    def __init__(self, text):
-        self.rowspan = 1
-        self.colspan = 1
-        self.text = text
-        self.header = False
-        self.align = None
-
-    def __repr__(self):
-        rspan = cspan = ''
-        if self.rowspan > 1:
-            rspan = f' rowspan="{self.rowspan}"'
-        if self.colspan > 1:
-            cspan = f' colspan="{self.colspan}"'
-        td = 'th' if self.header else 'td'
-        css_class = ''
-        if self.align:
-            css_class = f' class="cell-{self.align}"'
-        return f"<{td}{rspan}{cspan}{css_class}>{self.text}</{td}>"
-
-
-class Table:
-    def __init__(self):
-        self.centered = False
-        self.rows = []
-        self.first_row_header = False
-        self._align = []
-
-    def render(self):
-        self._scan_table()
-        table = '<table class="center">' if self.centered else "<table>"
-        index = 0
-        if self.first_row_header:
-            table += '<thead>\n<tr>'
-            for item in self.rows[0]:
-                if item is None:
-                    continue
-                table += f"{item}"
-            table += '</tr>\n</thead>'
-            index = 1
-
-        table += '<tbody>'
-        for row in self.rows[index:]:
-            table += '<tr>'
-            for item in row:
-                if item is None:
-                    continue
-                table += f'{item}'
-            table += '</tr>'
-        table += '</tbody>'
-        table += '</table>'
-        return table
-
-    def add_rows(self, row_list):
-        if (all(re_table_header_sep.match(x) for x in row_list) and
-            len(self.rows) == 1):
-            self.first_row_header = True
-            for row in row_list:
-                if row.strip().startswith(':') and row.strip().endswith(':'):
-                    self._align.append('center')
-                elif row.strip().endswith(':'):
-                    self._align.append('right')
-                else:
-                    self._align.append('left')
-            return
-        self.rows.append(row_list)
-
-    def _scan_table(self):  # noqa: C901
-        table = [[None for _ in x] for x in self.rows]
-
-        for x, row in enumerate(self.rows):
-            for y, item in enumerate(row):
-                alignment = None
-                if self._align:
-                    alignment = self._align[y]
-                if item.strip() == '\\/':
-                    counter = 0
-                    while counter is not None and x - counter >= 0:
-                        counter += 1
-                        if table[x-counter][y] is None:
-                            continue
-                        table[x-counter][y].rowspan += 1
-                        counter = None
-                    continue
-
-                if item.strip() == '>':
-                    counter = 0
-                    while counter is not None and y - counter >= 0:
-                        counter += 1
-                        if table[x][y-counter] is None:
-                            continue
-                        table[x][y-counter].colspan += 1
-                        counter = None
-                    continue
-
-                c = Cell(item)
-                if alignment and alignment != 'left':
-                    c.align = alignment
-                if self.first_row_header and x == 0:
-                    c.header = True
-                table[x][y] = c
-        self.rows = table
-
-
-class Definition:
-    def __init__(self, new_line=None):
-        self._lines = [new_line] if new_line else []
-
-    def append(self, item):
-        self._lines.append(item)
-
-    def add_to_line(self, item):
-        if not self._lines:
-            LOG.error('There is no lines in definition when expected')
-            return
-        self._lines[-1] += ' ' + item
-
-    def render(self):
-        return ''.join([f'<p>{p}</p>\n' for p in self._lines])
-
-class DefinitionList:
-    def __init__(self):
-        self.centered = False
-        self._definitions = []
-        self._html = ''
-        self.indent = None
-
-    def render(self):
-        for _def in self._definitions:
-            self._html += f"<dd>\n{_def.render()}</dd>\n"
-        output = '<dl class="center">\n' if self.centered else "<dl>\n"
-        if self._html:
-            output += self._html
-        output += '</dl>\n'
-        return output
-
-    def add_definition(self, title, def_):
-        if title:
-            if self._definitions:
-                for _def in self._definitions:
-                    self._html += f"<dd>\n{_def.render()}</dd>\n"
-                self._definitions = []
-            self._html += f'<dt>{title}</dt>\n'
-
-        if def_:
-            self._definitions.append(Definition(def_))
-
-    def add_to_def(self, content, new_para):
-        if not self._definitions:
-            LOG.error('There is no definitions in current deflist')
-            return
-
-        if new_para:
-            self._definitions[-1].append(content)
-        else:
-            self._definitions[-1].add_to_line(content)
-
 
 re_ph_nohtml = re.compile(r'^\s*%nohtml\s*$', flags=re.MULTILINE)
-re_ph_title = re.compile(r'^\s*%title\s(.*)$', flags=re.MULTILINE)
-re_ph_template = re.compile(r'^\s*%template\s(.*)$', flags=re.MULTILINE)
-re_ph_date = re.compile(r'^\s*%date\s(.*)$', flags=re.MULTILINE)
+# %title, %template, %date and %toc placeholders, each on its own line
+re_ph_directive = re.compile(r'^[ \t]*%(?P<name>title|template|date|toc)'
+                             r'(?:[ \t]+(?P<value>.*?))?[ \t]*$',
+                             flags=re.MULTILINE)
 # re_ph_plainhtml = re.compile(r'^\s*%plainhtml\s(.*)$', flags=re.MULTILINE)
-re_ph_toc = re.compile(r'(^\s*)(%toc)(\s*)$', flags=re.MULTILINE)
 
 re_ml_comment = re.compile(r'%%\+.*?\+%%', flags=re.DOTALL)
 re_codeblock = re.compile(r'^(\s*){{3}([^\n]*?)(\n.*?)\n^\s*}{3}\s*$',
@@ -245,7 +74,13 @@ re_transclusion_links = re.compile(r'(?<!{){{(?P<contents>[^}]+)}}(?!})')
 re_html_links = re.compile(r'\[\[(?P<contents>'
                            r'(?:http:|https:|ftp:|mailto:|www\.)?'
                            r'[^]]*)\]\]')
-re_table_header_sep = re.compile(r'\s*?:?-+:?\s*')
+# marker, which must be present in the line, regex, opening and closing tag
+TYPEFACES = (('_', re_italic, '<em>', '</em>'),
+             ('*', re_bold, '<strong>', '</strong>'),
+             ('~~', re_strike, '<del>', '</del>'),
+             ('^', re_superscript, '<sup><small>', '</small></sup>'),
+             (',,', re_subscript, '<sub><small>', '</small></sub>'))
+re_table = re.compile(r'^\s*\|.+\|\s*$')
 re_listdef = re.compile(r'^\s*(?P<title>.*)?::(?P<definition>\s.+)?\s*$')
 
 
@@ -254,43 +89,47 @@ class VimWiki2Html:
     Represent single wiki file
     """
     max_header_level = 6
-    # marks are using Unicode Supplementary Private Use Area A in unicode from
-    # the end of the set, there is low chance to fill those with custom
-    # glyphs, and even so, the sentence of **4** (where asterisk is such
-    # symbol and 4 represents any number) is pretty low to exists in written
-    # wiki text.
-    codeblock_mark = "󿿽󿿽{}󿿽󿿽"
-    inline_code_mark = " 󿿼󿿼{}󿿼󿿼"
-    links_mark = " 󿿻󿿻{}󿿻󿿻"
-    images_mark = "󿿺󿿺{}󿿺󿿺"
-    toc_mark = " 󿿹󿿹󿿹󿿹"
+    codeblock_mark = document.CODEBLOCK_MARK
+    inline_code_mark = document.INLINE_CODE_MARK
+    links_mark = document.LINKS_MARK
+    images_mark = document.IMAGES_MARK
+    toc_mark = document.TOC_MARK
 
     template_ext = 'tpl'
 
-    def __init__(self, wikifname, conf):
-        self.assets = conf.assets
+    def __init__(self, wikifname, conf, profile=None):
         self.root = conf.path
         self.template = None
         self.date = ''
         self.wiki_contents = None
         self.nohtml = False
-        self._html = ''
+        self.document = None
+        self._rendered = None
         self._table = False
         self.wiki_fname = wikifname
         self.output_dir = conf.path_html
-        self.html_fname = self.get_output_path()
+        # local files referenced by the page, relative to the wiki root
+        self.assets = []
+        # check if the local files exist, before adding them to assets
+        self.check_assets = True
         self._title = None
         self._code_blocks = []
         self._inline_codes = []
         self._links = []
         self._images = []
-        self._inline_codes_count = 0
         self._para = False
         self._line_processed = False
         self._lists = []
         self._deflist = None
         self._toc = None
+        # (line number, indentation) of the %toc placeholders
+        self._toc_lines = []
+        # headers for the table of contents
+        self._headers = []
+        # line number -> lines replacing the line with placeholder
+        self._directives = {}
         self.skip_toc_level = conf.skip_toc_level
+        self._profile = profile or profiling.NULL
 
     def get_output_path(self):
         # get relative link out of self.root
@@ -298,11 +137,14 @@ class VimWiki2Html:
         outpath = self.output_dir
         if os.path.dirname(path):
             outpath = os.path.join(self.output_dir, os.path.dirname(path))
-            os.makedirs(outpath, exist_ok=True)
 
         return os.path.join(outpath, os.path
                             .splitext(os.path.basename(path))[0] + '.html')
 
+    @property
+    def html_fname(self):
+        return self.get_output_path()
+
     @property
     def title(self):
         if not self._title:
@@ -311,28 +153,39 @@ class VimWiki2Html:
 
     @property
     def html(self):
-        _html = self._html
-        for index, contents in enumerate(self._code_blocks):
-            _html = _html.replace(self.codeblock_mark.format(index), contents)
-        for index, contents in enumerate(self._inline_codes):
-            _html = _html.replace(self.inline_code_mark.format(index),
-                                  contents)
-        for index, contents in enumerate(self._links):
-            _html = _html.replace(self.links_mark.format(index), contents)
-        for index, contents in enumerate(self._images):
-            _html = _html.replace(self.images_mark.format(index), contents)
-        if self._toc:
-            _html = _html.replace(self.toc_mark, self._toc)
-
-        return _html
+        """
+        Return rendered document. The result is computed only once.
+        """
+        if self.document is None:
+            return ''
+        if self._rendered is None:
+            with self._profile.phase('html'):
+                self._rendered = self.document.render()
+        return self._rendered
 
     def read_wiki_file(self, fname):
         with open(fname) as fobj:
             self.wiki_contents = fobj.read()
-        self.nohtml = bool(re_ph_nohtml.search(self.wiki_contents))
 
-    def convert(self):
-        self.read_wiki_file(self.wiki_fname)
+    def convert(self, *, copy_assets=True):
+        """
+        Read and parse the wiki file, and copy local files referenced by it
+        to the output directory, unless copy_assets is False, in which case
+        copying is left to the caller.
+        """
+        with self._profile.phase('read_wiki_file'):
+            self.read_wiki_file(self.wiki_fname)
+        self.parse()
+        if copy_assets and self.assets:
+            with self._profile.phase('copy_assets'):
+                self.copy_assets()
+
+    def parse(self):
+        """
+        Parse wiki_contents into the document, without writing anything.
+        """
+        self.nohtml = ('%nohtml' in self.wiki_contents and
+                       bool(re_ph_nohtml.search(self.wiki_contents)))
         # exit early if there is %nohtml placeholder
         if self.nohtml:
             LOG.info("Found nohtml placeholder, ignoring `%s'.",
@@ -341,18 +194,25 @@ class VimWiki2Html:
 
         # do global substitution and removal - remove multiline comments and
         # placeholders, and separate code blocks.
-        self._remove_multiline_comments()
-        self._separate_codeblocks()
-        self._find_title()
-        self._find_template()
-        self._find_date()
-        self._find_toc()
-
-        converted = self._process_linewise()
-        self._html = '\n'.join(converted)
+        for fn in (self._remove_multiline_comments, self._separate_codeblocks,
+                   self._find_directives):
+            with self._profile.phase(fn.__name__):
+                fn()
+
+        with self._profile.phase('_process_linewise'):
+            blocks = self._process_linewise()
+            if self._toc_lines:
+                self._toc = self._make_toc()
+            self.document = document.Document(
+                blocks, code_blocks=self._code_blocks,
+                inline_codes=self._inline_codes, links=self._links,
+                images=self._images, toc=self._toc)
+            self._rendered = None
 
     def _process_linewise(self):  # noqa: C901
         lsource = self.wiki_contents.split('\n')
+        if self._directives:
+            lsource = self._replace_directives(lsource)
 
         ldest = []
 
@@ -361,49 +221,53 @@ class VimWiki2Html:
 
             self._line_processed = False
             list_lines = None
-            header = re_header.match(line)
+            # first non blank character decides which kind of the block line
+            # can possibly start
+            first = line.lstrip()[:1]
+            header = first == '=' and re_header.match(line)
             if header:
                 list_lines = self._close_lists()
                 if list_lines:
                     ldest.extend(list_lines)
                 if self._deflist:
-                    ldest.append(self._deflist.render())
+                    ldest.append(self._deflist)
                     self._deflist = None
                 ldest.append(self._parse_header(header))
                 self._previus_line = line
                 continue
 
-            if re_comment.match(line):
+            if first == '%' and re_comment.match(line):
                 # ignore comments
                 continue
 
-            if re_hr.match(line):
+            if line.startswith('----') and re_hr.match(line):
                 list_lines = self._close_lists()
                 if list_lines:
                     ldest.extend(list_lines)
                 if self._deflist:
-                    ldest.append(self._deflist.render())
+                    ldest.append(self._deflist)
                     self._deflist = None
-                ldest.append('<hr />')
+                ldest.append(document.Rule())
                 self._previus_line = line
                 continue
 
-            lines = self._parse_line(line)
+            lines = self._parse_line(line, first)
 
             ldest.extend(lines)
             self._previus_line = line
 
         # remove blank lines
-        while ldest and ldest[-1].strip() == '':
+        while (ldest and isinstance(ldest[-1], document.Text) and
+               ldest[-1].html.strip() == ''):
             del ldest[-1]
 
         # process end of file
         # close opened tags if any
         lines = []
         if self._deflist:
-            lines.append(self._deflist.render())
+            lines.append(self._deflist)
         if self._table:
-            lines.append(self._table.render())
+            lines.append(self._table)
             self._table = False
         close_para(self._para, lines)
         lines.extend(self._close_lists())
@@ -434,26 +298,33 @@ class VimWiki2Html:
         # remove the trigger prefix
         pp = line.split(trigger)[1].strip()
 
-        lines.append(pp)
+        lines.append(document.Text(pp))
         return lines
 
     def _handle_paragraph(self, line):
         lines = []
         if line.strip():
             if not self._para:
-                lines.append('<p>')
+                lines.append(document.ParagraphOpen())
                 self._para = True
             self._line_processed = True
             # default is to ignore newlines (i.e. do not insert <br/> at the
             # end of the line)
-            lines.append(line)
+            lines.append(document.Text(self._apply_attrs(line)))
         elif self._para and line.strip() == '':
-            lines.append('</p>')
+            lines.append(document.ParagraphClose())
             self._para = False
 
         return lines
 
-    def _parse_line(self, line):
+    def _is_block_line(self, line, first):
+        """
+        Check if line might start or continue table, definition list or list.
+        """
+        return bool(self._table or self._deflist or self._lists or
+                    '::' in line or first == '|' or _is_list_start(first))
+
+    def _parse_line(self, line, first):
         res_lines = []
         self._line_processed = False
 
@@ -464,59 +335,42 @@ class VimWiki2Html:
 
         line = self._html_escape(line)
 
-        ### tables
-        lines = self._handle_tables(line)
-        if lines:
-            res_lines.extend(lines)
-        if self._line_processed:
-            return res_lines
-
-        # list definitions
-        lines = self._handle_list_definitions(line)
-        if lines:
-            res_lines.append(lines)
-        if self._line_processed:
-            return res_lines
-
-        # lists
-        lines = self._handle_list(line)
-        if self._line_processed:
-            res_lines.extend(lines)
-            return res_lines
-
-        if lines and self._line_processed:
-            res_lines.extend(lines)
+        # plain text, which cannot start nor continue any block, goes
+        # straight to the paragraph
+        if self._is_block_line(line, first):
+            ### tables
+            lines = self._handle_tables(line, first)
+            if lines:
+                res_lines.extend(lines)
+            if self._line_processed:
+                return res_lines
+
+            # list definitions
+            lines = self._handle_list_definitions(line, first)
+            if lines:
+                res_lines.append(lines)
+            if self._line_processed:
+                return res_lines
+
+            # lists
+            lines = self._handle_list(line, first)
+            if self._line_processed:
+                res_lines.extend(lines)
+                return res_lines
 
         # Paragraphs
         lines = self._handle_paragraph(line)
         if self._line_processed and self._lists:
             res_lines.extend(self._close_lists())
 
-        lines = [self._apply_attrs(x) for x in lines]
-
         res_lines.extend(lines)
 
         # add the rest
         if not self._line_processed:
-            res_lines.append(line)
+            res_lines.append(document.Text(line))
 
         return res_lines
 
-    def _parse_bold(self, line):
-        return re_bold.sub(r'<strong>\g<1></strong>', line)
-
-    def _parse_italic(self, line):
-        return re_italic.sub(r'<em>\g<1></em>', line)
-
-    def _parse_strikeout(self, line):
-        return re_strike.sub(r'<del>\g<1></del>', line)
-
-    def _parse_subscript(self, line):
-        return re_subscript.sub(r'<sub><small>\g<1></small></sub>', line)
-
-    def _parse_superscript(self, line):
-        return re_superscript.sub(r'<sup><small>\g<1></small></sup>', line)
-
     def _parse_inline_code(self, line):
         """
         Return code tagged line.
@@ -545,29 +399,29 @@ class VimWiki2Html:
         return f"<code{style}>{line}</code>"
 
     def _separate_codeblocks(self):
-        count = 0
-        while True:
-            pre = re_codeblock.search(self.wiki_contents)
-            if not pre:
-                break
-            x, y = pre.span()
-            indent, lexer, code = pre.groups()
-            self._code_blocks.append(self._make_pre(code, lexer))
-            self.wiki_contents = (self.wiki_contents[:x] + indent +
-                                  self.codeblock_mark.format(count) +
-                                  self.wiki_contents[y:])
-            count += 1
+        """
+        Replace code blocks with marks in a single pass over the wiki
+        contents, keeping indentation of the block.
+        """
+        def _replace(match):
+            indent, lexer, code = match.groups()
+            mark = self.codeblock_mark.format(len(self._code_blocks))
+            self._code_blocks.append(document.CodeBlock(self._make_pre(code,
+                                                                       lexer)))
+            return indent + mark
+
+        self.wiki_contents = re_codeblock.sub(_replace, self.wiki_contents)
 
     def _separate_inline_codes(self, line):
-        if codes := re_code.findall(line):
-            for code in codes:
-                self._inline_codes.append(self._parse_inline_code(code))
-                line = re_code.sub(self.inline_code_mark
-                                   .format(self._inline_codes_count), line,
-                                   count=1)
-                self._inline_codes_count += 1
+        if '`' not in line:
+            return line
+        return re_code.sub(self._replace_inline_code, line)
 
-        return line
+    def _replace_inline_code(self, match):
+        mark = self.inline_code_mark.format(len(self._inline_codes))
+        self._inline_codes.append(document.InlineCode(
+            self._parse_inline_code(match.group(1))))
+        return mark
 
     def _parse_header(self, line_match):
         open_level, title, close_level = line_match.groups()
@@ -577,19 +431,18 @@ class VimWiki2Html:
             LOG.warning("Header open level doesn't match close level in `%s`: "
                         "`%s' vs `%s'.", self.wiki_fname, open_level,
                         close_level)
-            return line_match.string
+            return document.Text(line_match.string)
         level = len(open_level)
         if level > self.max_header_level:
             LOG.warning("Headers in `%s'cannot exceed `%s` level.",
                         self.wiki_fname, self.max_header_level)
-            return line_match.string
+            return document.Text(line_match.string)
 
         title = _id = line_match["title"].strip()
-        title = self._apply_attrs(title)
-
-        return (f'<h{level} id="{_id}">'
-                f'<a href="#{_id}">{title}</a>'
-                f'</h{level}>\n')
+        header = document.Header(level, _id, self._apply_attrs(title))
+        if level > self.skip_toc_level:
+            self._headers.append(header)
+        return header
 
     def _apply_attrs(self, line):
         """
@@ -598,12 +451,41 @@ class VimWiki2Html:
         Parse markup fdor bold, italic, strikethrough, superscipt, subscript
         and code.
         """
-        processed_line = line
-        for fn in (self._separate_inline_codes, self._handle_links,
-                   self._parse_italic, self._parse_bold, self._parse_strikeout,
-                   self._parse_superscript, self._parse_subscript):
-            processed_line = fn(processed_line)
-        return processed_line
+        line = self._separate_inline_codes(line)
+        line = self._handle_links(line)
+        return self._parse_typefaces(line)
+
+    def _parse_typefaces(self, line):
+        """
+        Replace markup for italic, bold, strikeout, superscript and subscript
+        with html tags, building resulting line at once.
+
+        Every kind of markup is searched in the original line independently,
+        so the tags might cross each other, i.e. "*_foo* bar_" will be
+        converted to "<strong><em>foo</strong> bar</em>". Markup characters
+        are distinct for every kind, so replaced parts never overlap.
+        """
+        replacements = []
+        for marker, regex, open_tag, close_tag in TYPEFACES:
+            if marker not in line:
+                continue
+            for match in regex.finditer(line):
+                start, end = match.span(1)
+                replacements.append((match.start(), start, open_tag))
+                replacements.append((end, match.end(), close_tag))
+
+        if not replacements:
+            return line
+
+        replacements.sort()
+        parts = []
+        position = 0
+        for start, end, tag in replacements:
+            parts.append(line[position:start])
+            parts.append(tag)
+            position = end
+        parts.append(line[position:])
+        return ''.join(parts)
 
     def _make_pre(self, code, lexer=None):
         """
@@ -616,7 +498,8 @@ class VimWiki2Html:
 
         highlighted = None
         if pygments and lexer:
-            highlighted = self._highlight(code, lexer)
+            with self._profile.phase('pygments'):
+                highlighted = self._highlight(code, lexer)
         if not highlighted:
             highlighted = ('<pre class="code literal-block">' +
                            html.escape(code) + '</pre>')
@@ -665,103 +548,98 @@ class VimWiki2Html:
         """
         self.wiki_contents = re_ml_comment.sub('', self.wiki_contents)
 
-    def _find_title(self):
+    def _find_directives(self):
         """
-        Search for %title placeholder. If found set title and remove the line
-        from source wiki.
-        """
-        result = re_ph_title.search(self.wiki_contents)
-
-        if not result:
-            return
-        self._title = result.groups()[0].strip()
-        self.wiki_contents = re_ph_title.sub('\n', self.wiki_contents)
-
-    def _find_template(self):
-        """
-        Search for %template placeholder.
-
-        The argument for the %template placeholder should be name of the file
-        without a path (root of the vimwiki) and extension (.tpl by defult).
+        Search for %title, %template, %date and %toc placeholders in a single
+        pass. The first value found for every placeholder is used. Lines
+        with placeholders are replaced during line processing by the table
+        of contents mark (for %toc, unless there are no headers for it) or
+        by two empty lines (all the others), which close paragraph and lists
+        placeholder was put in. Table of contents itself is made out of the
+        headers found during line processing.
         """
-        result = re_ph_template.search(self.wiki_contents)
-
-        if not result:
+        if '%' not in self.wiki_contents:
             return
 
-        self.template = result.groups()[0].strip()
-        self.wiki_contents = re_ph_template.sub('\n', self.wiki_contents)
-
-    def _find_date(self):
-        """
-        Search for %date placeholder. If found set it and remove the line from
-        source wiki.
-        """
-        result = re_ph_date.search(self.wiki_contents)
+        values = {}
+        lineno = 0
+        position = 0
+        for match in re_ph_directive.finditer(self.wiki_contents):
+            name, value = match.group('name', 'value')
+            if name == 'toc' and value:
+                continue
+            lineno += self.wiki_contents.count('\n', position, match.start())
+            position = match.start()
+            values.setdefault(name, value or '')
+            if name == 'toc':
+                indent = match[0][:match[0].index('%')]
+                self._toc_lines.append((lineno, indent))
+            else:
+                self._directives[lineno] = ['', '']
 
-        if not result:
-            return
+        if self._toc_lines:
+            # without headers, %toc lines are left empty, so that they
+            # close paragraph and lists like any other empty line
+            mark = self.toc_mark if self._has_toc_headers() else ''
+            for lineno, indent in self._toc_lines:
+                self._directives[lineno] = [indent + mark]
 
-        self.date = result.groups()[0].strip()
-        self.wiki_contents = re_ph_date.sub('\n', self.wiki_contents)
+        self._title = values.get('title') or self._title
+        self.template = values.get('template') or self.template
 
-        if not self.date:
+        if 'date' in values:
             # TODO: support different date formats - another commandline
             # argument?
             # TODO: support TZ for current date
-            self.date = datetime.datetime.now(tz=datetime
-                                              .UTC).strftime('%Y-%m-%d')
+            self.date = values['date'] or datetime.datetime.now(
+                tz=datetime.UTC).strftime('%Y-%m-%d')
+
+    def _replace_directives(self, lines):
+        result = []
+        position = 0
+        for lineno in sorted(self._directives):
+            result.extend(lines[position:lineno])
+            result.extend(self._directives[lineno])
+            position = lineno + 1
+        result.extend(lines[position:])
+        return result
 
-    def _find_toc(self):
+    def _handle_links(self, line):
         """
-        Search for %toc placeholder. If found set title and remove the line
-        from source wiki.
+        Replace links with marks. Every kind of the links is substituted in a
+        single pass over the line, in order: transclusions, html links, wiki
+        links and bare links, so that i.e. transclusion can be used as a
+        description of wiki link.
         """
-        result = re_ph_toc.search(self.wiki_contents)
-
-        if not result:
-            return
-
-        toc = self._parse_toc()
-        if toc:
-            self._toc = toc
-            self.wiki_contents = re_ph_toc.sub(rf'\1{self.toc_mark}\3',
-                                               self.wiki_contents)
-        else:
-            # remove toc
-            self.wiki_contents = re_ph_toc.sub(r'\1\3', self.wiki_contents)
-
-    def _handle_links(self, line):
-        # transclusions
-        for link in re_transclusion_links.finditer(line):
-            line = re_transclusion_links.sub(self.images_mark
-                                             .format(len(self._images)),
-                                             line, count=1)
-            self._images.append(self._get_img_out_of_string(link.groupdict()
-                                                            ['contents']))
-
-        # wiki links
-        for link in re_html_links.finditer(line):
-            line = re_html_links.sub(self.links_mark.format(len(self._links)),
-                                     line, count=1)
-            self._links.append(self._get_link_out_of_string(link.groupdict()
-                                                            ['contents']))
-
-        # wiki links
-        for link in re_wiki_links.finditer(line):
-            line = re_wiki_links.sub(self.links_mark.format(len(self._links)),
-                                     line, count=1)
-            self._links.append(self._get_link_out_of_string(link.groupdict()
-                                                            ['contents']))
-
-        # bare links
-        for link in re_bare_links.finditer(line):
-            line = re_bare_links.sub(self.links_mark.format(len(self._links)),
-                                     line, count=1)
-            self._links.append(f'<a href="{link.groups()[0]}">'
-                               f'{link.groups()[0]}</a>')
+        if '{{' in line:
+            line = re_transclusion_links.sub(self._replace_transclusion, line)
+        if '[[' in line:
+            line = re_html_links.sub(self._replace_link, line)
+            line = re_wiki_links.sub(self._replace_link, line)
+        if ':' in line or 'www.' in line:
+            line = re_bare_links.sub(self._replace_bare_link, line)
         return line
 
+    def _replace_transclusion(self, match):
+        mark = self.images_mark.format(len(self._images))
+        self._images.append(document.Image(
+            match['contents'].split('|', 1)[0],
+            self._get_img_out_of_string(match['contents'])))
+        return mark
+
+    def _replace_link(self, match):
+        mark = self.links_mark.format(len(self._links))
+        self._links.append(document.Link(
+            match['contents'].split('|', 1)[0],
+            self._get_link_out_of_string(match['contents'])))
+        return mark
+
+    def _replace_bare_link(self, match):
+        mark = self.links_mark.format(len(self._links))
+        self._links.append(document.Link(
+            match[1], f'<a href="{match[1]}">{match[1]}</a>'))
+        return mark
+
     def _get_img_out_of_string(self, string):
         alt_attrs_dest = 3
         attrs_dest = 2
@@ -786,17 +664,21 @@ class VimWiki2Html:
                 img = dest[len(schema):]
                 break
         if img:
-            img = self._copy_asset(img)
+            img = self._add_asset(img)
             return template % img
 
         if dest.lower().startswith('http'):
             return template % dest
 
         LOG.warning("Image `%s' in `%s' have no schema", dest, self.wiki_fname)
-        img = self._copy_asset(dest)
+        img = self._add_asset(dest)
         return template % dest
 
-    def _copy_asset(self, img):
+    def _add_asset(self, img):
+        """
+        Add local file to the assets, and return its path relative to the
+        wiki root, or the unchanged path if file cannot be used.
+        """
         if (img[0].isalpha() and img[1] == ':'):
             # ignore windows FS for now
             return img
@@ -808,17 +690,24 @@ class VimWiki2Html:
                         img)
             return img
 
-        if not os.path.exists(os.path.join(self.root, filepath)):
+        if (self.check_assets and
+                not os.path.exists(os.path.join(self.root, filepath))):
             LOG.warning("File `%s' in `%s' doesn't exists, ignoring", img,
                         self.wiki_fname)
             return img
 
-        fullpath = os.path.join(self.root, filepath)
-        outpath = os.path.join(self.output_dir, os.path.dirname(filepath))
-        os.makedirs(outpath, exist_ok=True)
-        shutil.copy(fullpath, outpath)
+        self.assets.append(filepath)
         return filepath
 
+    def copy_assets(self):
+        """
+        Copy local files referenced by the page to the output directory.
+        """
+        for filepath in dict.fromkeys(self.assets):
+            outpath = os.path.join(self.output_dir, os.path.dirname(filepath))
+            os.makedirs(outpath, exist_ok=True)
+            shutil.copy(os.path.join(self.root, filepath), outpath)
+
     def _get_link_out_of_string(self, string):  # noqa: C901 PLR0911 PLR0912
         description = None
         attrs = ''
@@ -851,7 +740,7 @@ class VimWiki2Html:
             if not (link[0].isalpha() and link[1] == ':'
                     and os.path.isabs(link)):
                 link = os.path.expandvars(os.path.expanduser(link))
-                link = self._copy_asset(link)
+                link = self._add_asset(link)
             return template % (link, attrs, description)
 
         # absolute links
@@ -898,7 +787,7 @@ class VimWiki2Html:
 
         raise ValueError(string)
 
-    def _handle_list_definitions(self, line):  # noqa: C901 PLR0911 PLR0912
+    def _handle_list_definitions(self, line, first):  # noqa: C901 PLR0911 PLR0912
         """
         Handle definition lists
         """
@@ -907,7 +796,7 @@ class VimWiki2Html:
             self._line_processed = True
             return None
 
-        match = re_listdef.match(line)
+        match = '::' in line and re_listdef.match(line)
 
         if not match:
             if self._deflist:
@@ -916,10 +805,10 @@ class VimWiki2Html:
                 list_frag = ''
 
                 if self._lists:
-                    list_frag = self._handle_list(line)
+                    list_frag = self._handle_list(line, first)
                     if list_frag:
-                        self._deflist.add_to_def(''.join(list_frag),
-                                                 new_para=False)
+                        self._deflist.add_to_def(
+                            document.render_nodes(list_frag), new_para=False)
                         if self._lists:  # list not closed yet
                             self._line_processed = True
                             return None
@@ -932,9 +821,10 @@ class VimWiki2Html:
                     return None
 
                 if indent == self._deflist.indent:
-                    html =  self._handle_list(line)
+                    html =  self._handle_list(line, first)
                     if html:
-                        self._deflist.add_to_def(''.join(html), new_para)
+                        self._deflist.add_to_def(document.render_nodes(html),
+                                                 new_para)
                     else:
                         self._deflist.add_to_def(self._apply_attrs(line.strip()),
                                                  new_para)
@@ -942,12 +832,13 @@ class VimWiki2Html:
                     return None
 
                 if self._lists:
-                    self._deflist.add_to_def(''.join(self._close_lists()),
-                                             new_para=False)
+                    self._deflist.add_to_def(
+                        document.render_nodes(self._close_lists()),
+                        new_para=False)
 
-                html = self._deflist.render()
+                deflist = self._deflist
                 self._deflist = None
-                return html
+                return deflist
             return None
 
         self._line_processed = True
@@ -960,11 +851,11 @@ class VimWiki2Html:
             definition = self._apply_attrs(definition.strip())
 
         if self._deflist and self._lists:
-            self._deflist.add_to_def(''.join(self._close_lists()),
-                                     new_para=False)
+            self._deflist.add_to_def(
+                document.render_nodes(self._close_lists()), new_para=False)
 
         if not self._deflist:
-            self._deflist = DefinitionList()
+            self._deflist = document.DefinitionList()
         self._deflist.add_definition(title, definition)
 
         if indent is not None:
@@ -972,7 +863,7 @@ class VimWiki2Html:
 
         return None
 
-    def _handle_list(self, line):  # noqa: C901 PLR0911 PLR0912
+    def _handle_list(self, line, first):  # noqa: C901 PLR0911 PLR0912
         """
         Handle possible list item. Return html line(s) or untouched line.
 
@@ -981,9 +872,9 @@ class VimWiki2Html:
         """
 
         def _new_list(indent, html_ltype, html_check, text):
-            self._lists.append(List(indent, html_ltype))
+            self._lists.append(List(len(indent), html_ltype))
             self._line_processed = True
-            return f"<{html_ltype}>\n<li{html_check}>\n{text}"
+            return document.ListOpen(html_ltype, html_check, text)
 
         # prepare regexps for lists
         bullets = ['-', '*']
@@ -996,6 +887,7 @@ class VimWiki2Html:
                              'X': 'done4'}
 
         indent = list_type = checkbox = text = None
+        html_ltype = html_check = None
         ret_lines = []
 
         # empty, not indented line
@@ -1004,24 +896,26 @@ class VimWiki2Html:
                 self._line_processed = True
                 ret_lines.extend(self._close_lists())
             else:
-                ret_lines.append(line)
+                ret_lines.append(document.Text(line))
             return ret_lines
 
-        match = re_list.match(line)
+        match = _is_list_start(first) and re_list.match(line)
 
         if not match:
             if not self._lists:
                 return None
-            match = re_indented_text.match(line)
+            match = line[:1].isspace() and re_indented_text.match(line)
             if not match:
                 return None
             indent, text = match.groups()
+            if len(indent) < self._lists[0].indent:
+                # text indented less than any of the lists doesn't belong to
+                # them, lists are closed by the paragraph it starts
+                return None
         else:
             indent, list_type, checkbox, text = match.groups()
             html_ltype = 'ul' if list_type in bullets else 'ol'
-            html_check = ''
-            if checkbox in checkbox_defaults:
-                html_check = f' class="{checkbox_defaults[checkbox]}"'
+            html_check = checkbox_defaults.get(checkbox)
 
         text = self._apply_attrs(text)
 
@@ -1032,9 +926,9 @@ class VimWiki2Html:
             return ret_lines
 
         if self._lists:
-            for _list in reversed(self._lists):
-                if len(indent) >= len(_list.indent):
-                    index = self._lists.index(_list)
+            width = len(indent)
+            for index in range(len(self._lists) - 1, -1, -1):
+                if width >= self._lists[index].indent:
                     break
             else:
                 ret_lines.extend(self._close_lists())
@@ -1042,18 +936,18 @@ class VimWiki2Html:
                                            text))
                 return ret_lines
 
-            if len(self._lists[index+1:]):
+            if index < len(self._lists) - 1:
                 ret_lines.extend(self._close_lists(index=index))
 
             if list_type:
-                if len(indent) > len(self._lists[-1].indent):
-                    self._lists.append(List(indent, html_ltype))
-                    ret_lines.append(f"<{html_ltype}>\n"
-                                     f"<li{html_check}>\n{text}")
+                if width > self._lists[-1].indent:
+                    self._lists.append(List(width, html_ltype))
+                    ret_lines.append(document.ListOpen(html_ltype,
+                                                       html_check, text))
                 else:
-                    ret_lines.append(f'</li>\n<li{html_check}>\n{text}')
+                    ret_lines.append(document.ListItem(html_check, text))
             else:
-                ret_lines.append(text)
+                ret_lines.append(document.Text(text))
 
             self._line_processed = True
             return ret_lines
@@ -1070,24 +964,26 @@ class VimWiki2Html:
         if not self._lists:
             ret_lines = []
         elif index is None:
-            ret_lines = [f"</li>\n</{o.list_type}>\n"
+            ret_lines = [document.ListClose(o.list_type)
                          for o in reversed(self._lists)]
             self._lists = []
         else:
-            ret_lines = [f"</li>\n</{o.list_type}>\n"
+            ret_lines = [document.ListClose(o.list_type)
                          for o in reversed(self._lists[index + 1:])]
             self._lists = self._lists[:index + 1]
         return ret_lines
 
     def _html_escape(self, line):
         line = line.replace('&', '&amp;')
+        if '<' not in line:
+            return line
         return re_safe_html.sub('&lt;\\1&gt;', line)
 
-    def _handle_tables(self, line):
-        if not re.match(r'^\s*\|.+\|\s*$', line):
+    def _handle_tables(self, line, first):
+        if first != '|' or not re_table.match(line):
             if self._table:
                 # close table
-                lines = [self._table.render()]
+                lines = [self._table]
                 self._table = False
                 #self._line_processed = True
                 return lines
@@ -1095,7 +991,7 @@ class VimWiki2Html:
 
         line = self._apply_attrs(line)
         if not self._table:
-            self._table = Table()
+            self._table = document.Table()
             self._table.centered = line.startswith(' ')
         # remove first and last |, split it to have contents
         self._table.add_rows(line.strip()[1:-1].split('|'))
@@ -1105,36 +1001,36 @@ class VimWiki2Html:
         self._line_processed = True
         return []
 
-    def _parse_toc(self):  # noqa: C901
-        data = []
-        current_level = None
-
+    def _has_toc_headers(self):
+        """
+        Check if there is any header for the table of contents. Header lines
+        are only matched here, titles are parsed during line processing.
+        """
         for line in self.wiki_contents.split('\n'):
-            header = re_header.match(line)
-            if not header:
-                continue
-            open_level, title, close_level = header.groups()
-            open_level = open_level.strip()
-            close_level = close_level.strip()
-            if open_level != close_level:
-                # Warning will be issued when parsing headers, ignore
+            if line.lstrip()[:1] != '=':
                 continue
-            level = len(open_level)
-            if level > self.max_header_level:
-                # Warning will be issued when parsing headers, ignore
-                continue
-            if level <= self.skip_toc_level:
+            match = re_header.match(line)
+            if not match:
                 continue
-            title = _id = header["title"].strip()
-            title = self._apply_attrs(title)
-            data.append((level, title, _id))
-
-        if not data:
+            open_level = match['open_level'].strip()
+            if (open_level == match['close_level'].strip() and
+                    self.skip_toc_level < len(open_level) <=
+                    self.max_header_level):
+                return True
+        return False
+
+    def _make_toc(self):
+        """
+        Return table of contents made out of the headers collected during
+        line processing, or empty string if there are none.
+        """
+        if not self._headers:
             return ""
 
-        current_level = min([x[0] for x in data])
+        current_level = min([x.level for x in self._headers])
         html = []
-        for level, title, _id in data:
+        for header in self._headers:
+            level = header.level
             if level > current_level:
                 html.append('<ul>\n<li>' * (level - current_level))
                 current_level = level
@@ -1148,7 +1044,7 @@ class VimWiki2Html:
                 html.append('<li>')
             else:
                 html.append('</li>\n<li>')
-            html.append(f'<a href="#{_id}">{title}</a>')
+            html.append(f'<a href="#{header.id}">{header.title}</a>')
 
         html.extend(['</li>\n</ul>\n'
                      for i in range(current_level - (self.skip_toc_level + 1),
@@ -1156,8 +1052,15 @@ class VimWiki2Html:
         return "<nav>\n<ul>" + "".join(html) + "</nav>"
 
 
+def _is_list_start(char):
+    """
+    Check if list item can start with provided character.
+    """
+    return char in ('*', '-', '#') or char.isdigit()
+
+
 def close_para(para, ldest):
     if para:
-        ldest.insert(0, '</p>')
+        ldest.insert(0, document.ParagraphClose())
         return 0
     return para
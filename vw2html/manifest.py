@@ -0,0 +1,156 @@
+"""
+Build manifest, which is kept in the output directory and holds information
+about every converted page - hash of the source file contents, name of the
+template used for rendering it and hashes of the template and stylesheet files
+page depends on, time the conversion took, the converter version and the
+mode assets were published with.
+It is used for deciding, whether page needs to be rebuild, instead of
+comparing modification times of the source and destination files, which are
+not reliable after git checkout, rsync or restoring from backup.
+"""
+import hashlib
+import json
+import logging
+import os
+
+import vw2html
+
+LOG = logging.getLogger()
+MANIFEST_FNAME = '.vw2html.json'
+
+
+def file_hash(path):
+    """
+    Return hex digest for the file contents or empty string if file cannot be
+    read.
+    """
+    try:
+        with open(path, 'rb') as fobj:
+            return hashlib.file_digest(fobj, 'sha256').hexdigest()
+    except OSError:
+        return ''
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Manifest:
+    """
+    Map of the source wiki files (relative to the wiki root) to the data
+    describing state of the inputs during last conversion. Pages are
+    considered stale, if manifest was written with different asset mode, so
+    that files referenced by them are published again with the current one.
+    """
+
+    def __init__(self, path_html, asset_mode=None):
+        self.fname = os.path.join(path_html, MANIFEST_FNAME)
+        self.asset_mode = asset_mode
+        self.pages = {}
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self.fname) as fobj:
+                data = json.load(fobj)
+        except FileNotFoundError:
+            LOG.info("No build manifest found, all files will be converted")
+            return
+        except (OSError, ValueError):
+            LOG.warning("Cannot read build manifest `%s', all files will be "
+                        "converted", self.fname)
+            return
+
+        if data.get('version') != vw2html.__version__:
+            LOG.info("Build manifest was created with different converter "
+                     "version, all files will be converted")
+            return
+        if data.get('asset_mode') != self.asset_mode:
+            LOG.info("Assets were published with different mode, all files "
+                     "will be converted")
+            return
+        self.pages = data.get('pages', {})
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_fname = self.fname + '.tmp'
+        try:
+            with open(tmp_fname, 'w') as fobj:
+                json.dump({'version': vw2html.__version__,
+                           'asset_mode': self.asset_mode,
+                           'pages': self.pages}, fobj, separators=(',', ':'))
+            os.replace(tmp_fname, self.fname)
+        except OSError as exc:
+            LOG.warning("Cannot write build manifest `%s': %s", self.fname,
+                        exc.strerror)
+            return
+        self._dirty = False
+
+    def is_stale(self, key, source, html_fname, get_deps):
+        """
+        Check if page identified by the key needs to be converted.
+
+        Page is stale, if there is no entry for it, the output file is
+        missing, source contents or any of the dependency hashes differs
+        from the recorded ones. Dependencies are obtained by calling
+        get_deps with the template name page was rendered with last time.
+        Source file is hashed only if its size or modification time changed
+        since the last build.
+        """
+        entry = self.pages.get(key)
+        if not entry:
+            return True
+
+        if entry['deps'] != get_deps(entry.get('template')):
+            return True
+
+        if not entry['nohtml'] and not os.path.exists(html_fname):
+            return True
+
+        return self._is_source_changed(entry, source)
+
+    def _is_source_changed(self, entry, source):
+        """
+        Check if source file differs from the one recorded in the entry.
+        """
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return True
+
+        if (stat.st_size, stat.st_mtime_ns) == (entry['size'],
+                                                entry['mtime']):
+            return False
+
+        if file_hash(source) != entry['hash']:
+            return True
+
+        # contents are the same, only timestamp has changed, remember it to
+        # avoid hashing next time.
+        entry['size'] = stat.st_size
+        entry['mtime'] = stat.st_mtime_ns
+        self._dirty = True
+        return False
+
+    def add(self, key, source, deps, *, nohtml=False,  # noqa: PLR0913
+            template=None, duration=None):
+        try:
+            stat = os.stat(source)
+        except OSError:
+            self.pages.pop(key, None)
+            self._dirty = True
+            return
+
+        self.pages[key] = {'hash': file_hash(source),
+                           'size': stat.st_size,
+                           'mtime': stat.st_mtime_ns,
+                           'template': template,
+                           'deps': deps,
+                           'nohtml': nohtml,
+                           'time': duration}
+        self._dirty = True
+
+    def remove(self, key):
+        if self.pages.pop(key, None):
+            self._dirty = True
@@ -0,0 +1,78 @@
+"""
+Lightweight per-phase profiler for the conversion pipeline. It only measures
+wall time and number of calls of the named phases, so that it can be used
+across the worker processes - phases data is a plain dictionary, which is
+send back to the main process together with page conversion result and
+summed up there.
+
+Phases can be nested. Time recorded for a phase doesn't include time of the
+phases nested in it, i.e. time spent on highlighting code with Pygments is not
+counted for _separate_codeblocks, so times of all phases sum up to the time
+of the whole conversion.
+"""
+import contextlib
+import json
+import time
+
+
+class NullProfile:
+    """
+    Profiler, which doesn't record anything. Used when profiling is off.
+    """
+    _context = contextlib.nullcontext()
+
+    def phase(self, name):  # noqa: ARG002
+        return self._context
+
+
+NULL = NullProfile()
+
+
+class Profile:
+    """
+    Record time and number of calls for the phases.
+    """
+
+    def __init__(self):
+        # phase name -> [calls, time]
+        self.phases = {}
+        # time taken by nested phases, for every phase which is running
+        self._nested = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self._nested.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += duration
+            data = self.phases.setdefault(name, [0, 0])
+            data[0] += 1
+            data[1] += duration - nested
+
+    def merge(self, phases):
+        """
+        Add phases data gathered by other profiler.
+        """
+        for name, (calls, duration) in phases.items():
+            data = self.phases.setdefault(name, [0, 0])
+            data[0] += calls
+            data[1] += duration
+
+    def save(self, fname, **extra):
+        """
+        Write phases data as JSON, with the most time consuming phases first.
+        Additional keyword arguments are written in the top level object.
+        """
+        phases = {name: {'calls': calls, 'time': round(duration, 6)}
+                  for name, (calls, duration) in
+                  sorted(self.phases.items(), key=lambda x: -x[1][1])}
+        total = sum(x[1] for x in self.phases.values())
+        with open(fname, 'w') as fobj:
+            json.dump({**extra, 'total': round(total, 6), 'phases': phases},
+                      fobj, indent=2)
+            fobj.write('\n')
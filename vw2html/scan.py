@@ -0,0 +1,215 @@
+"""
+Scanner for the wiki files. Directory tree is traversed with os.scandir, and
+wiki files are yielded as soon as they are found, skipping:
+
+- excluded directories, like the output directory placed within the wiki
+  root,
+- files and directories matching exclude patterns from the configuration or
+  from the .vw2htmlignore files,
+- directories which were already scanned, so that symlink pointing to the
+  parent directory doesn't cause an infinite loop, and directory reachable by
+  several paths (i.e. through symlinks or bind mounts) is scanned only once.
+
+Patterns are shell-style wildcards, where * and ? don't match the slash, and
+** matches anything. Pattern without slash is matched against
+the name of the file or directory, otherwise against its path relative to the
+directory, where the pattern is defined - wiki root for the configuration, and
+the directory containing .vw2htmlignore file, which patterns apply only to that
+directory and its subdirectories. Pattern ending with slash matches only
+directories. In .vw2htmlignore every line is a pattern, empty lines and lines
+starting with # are ignored.
+"""
+import logging
+import os
+import re
+
+LOG = logging.getLogger()
+IGNORE_FNAME = '.vw2htmlignore'
+RE_WILDCARD = re.compile(r'(\*\*|\*|\?|\[[^\]]+\])')
+# length of the shortest negated set, i.e. [!a]
+NEGATED_SET_MIN_LEN = 4
+
+
+def _translate(pattern):
+    """
+    Return regex for the wildcard pattern.
+    """
+    parts = []
+    for index, part in enumerate(RE_WILDCARD.split(pattern)):
+        if index % 2 == 0:
+            parts.append(re.escape(part))
+        elif part == '**':
+            parts.append('.*')
+        elif part == '*':
+            parts.append('[^/]*')
+        elif part == '?':
+            parts.append('[^/]')
+        elif part.startswith('[!') and len(part) >= NEGATED_SET_MIN_LEN:
+            parts.append('[^' + part[2:-1].replace('\\', '\\\\') + ']')
+        else:
+            parts.append('[' + part[1:-1].replace('\\', '\\\\') + ']')
+    return re.compile(''.join(parts) + r'\Z')
+
+
+class Pattern:
+    __slots__ = ('_regex', 'base', 'dir_only', 'match_path')
+
+    def __init__(self, pattern, base=''):
+        self.base = base
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.strip('/')
+        self.match_path = '/' in pattern
+        self._regex = _translate(pattern)
+
+    def match(self, relpath, name, is_dir):
+        """
+        Check if the file or directory matches the pattern. Relpath is its
+        path relative to the wiki root, using slash as a separator.
+        """
+        if self.dir_only and not is_dir:
+            return False
+        if not self.match_path:
+            return self._regex.match(name) is not None
+        if self.base:
+            relpath = relpath[len(self.base) + 1:]
+        return self._regex.match(relpath) is not None
+
+
+def read_ignore_file(path, base=''):
+    """
+    Return list of patterns from the ignore file. Base is the path of the
+    directory containing it, relative to the wiki root.
+    """
+    try:
+        with open(path) as fobj:
+            lines = fobj.read().splitlines()
+    except OSError as exc:
+        LOG.warning("Cannot read `%s': %s", path, exc.strerror)
+        return []
+    lines = [x.strip() for x in lines]
+    return [Pattern(x, base) for x in lines if x and not x.startswith('#')]
+
+
+def is_excluded(root, path, patterns=()):
+    """
+    Check if the file or directory within the root is excluded by the
+    patterns or by the .vw2htmlignore files, either by itself or by any of
+    its parent directories. Paths outside of the root are never excluded.
+    """
+    relpath = os.path.relpath(path, root)
+    if relpath == os.curdir or relpath.startswith(os.pardir):
+        return False
+    names = relpath.split(os.sep)
+    patterns = [Pattern(x) for x in patterns]
+    dirpath = root
+    for index, name in enumerate(names):
+        ignore_fname = os.path.join(dirpath, IGNORE_FNAME)
+        if os.path.exists(ignore_fname):
+            patterns += read_ignore_file(ignore_fname,
+                                         '/'.join(names[:index]))
+        dirpath = os.path.join(dirpath, name)
+        is_dir = index < len(names) - 1 or os.path.isdir(dirpath)
+        if any(x.match('/'.join(names[:index + 1]), name, is_dir)
+               for x in patterns):
+            return True
+    return False
+
+
+def read_patterns(root, path, patterns=()):
+    """
+    Return patterns applying to the contents of the directory within the
+    root: the ones from configuration and from the .vw2htmlignore files of
+    its parent directories. Directory's own .vw2htmlignore file is not read.
+    """
+    result = [Pattern(x) for x in patterns]
+    relpath = os.path.relpath(path, root)
+    if relpath == os.curdir or relpath.startswith(os.pardir):
+        return result
+    names = relpath.split(os.sep)
+    dirpath = root
+    for index, name in enumerate(names):
+        ignore_fname = os.path.join(dirpath, IGNORE_FNAME)
+        if os.path.exists(ignore_fname):
+            result += read_ignore_file(ignore_fname, '/'.join(names[:index]))
+        dirpath = os.path.join(dirpath, name)
+    return result
+
+
+def _get_dir_key(path):
+    """
+    Return (device, inode) pair identifying the directory, or None if it
+    doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _classify(entry, relpath, ext, patterns):
+    """
+    Return 'file' for the wiki file, 'dir' for the directory, or None if
+    entry should be skipped.
+    """
+    try:
+        is_dir = entry.is_dir()
+    except OSError:
+        return None
+    if any(x.match(relpath, entry.name, is_dir) for x in patterns):
+        return None
+    if is_dir:
+        return 'dir'
+    if entry.name.endswith(ext) and entry.is_file():
+        return 'file'
+    return None
+
+
+def scan(root, ext, exclude=(), patterns=()):
+    """
+    Yield paths of the files with provided extension found in the root
+    directory tree. Exclude is a list of the directories to skip, patterns is
+    a list of exclude patterns.
+    """
+    excluded = {_get_dir_key(x) for x in exclude} - {None}
+    try:
+        stat = os.stat(root)
+    except OSError as exc:
+        LOG.warning("Cannot scan directory `%s': %s", root, exc.strerror)
+        return
+    visited = {(stat.st_dev, stat.st_ino)}
+
+    stack = [(root, '', [Pattern(x) for x in patterns])]
+    while stack:
+        path, relpath, patterns = stack.pop()
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError as exc:
+            LOG.warning("Cannot scan directory `%s': %s", path, exc.strerror)
+            continue
+
+        if any(x.name == IGNORE_FNAME for x in entries):
+            patterns = patterns + read_ignore_file(
+                os.path.join(path, IGNORE_FNAME), relpath)
+
+        subdirs = []
+        for entry in entries:
+            entry_relpath = (f'{relpath}/{entry.name}' if relpath
+                             else entry.name)
+            kind = _classify(entry, entry_relpath, ext, patterns)
+            if kind == 'file':
+                yield entry.path
+            if kind != 'dir':
+                continue
+
+            key = _get_dir_key(entry.path)
+            if key is None or key in excluded:
+                continue
+            if key in visited:
+                LOG.debug("Directory `%s' was already scanned, skipping",
+                          entry.path)
+                continue
+            visited.add(key)
+            subdirs.append((entry.path, entry_relpath, patterns))
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,239 @@
+"""
+Filesystem watchers used by the watch mode. On Linux inotify is used through
+ctypes, on other systems (or if inotify cannot be initialized, i.e. due to
+exhausted watch limit) directory tree is periodically polled for the changes.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from vw2html import scan
+
+LOG = logging.getLogger()
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+           IN_DELETE)
+EVENT = struct.Struct('iIII')
+
+
+class Watcher:
+    """
+    Base class for the watchers. Paths provided by exclude list (and their
+    contents) are ignored, as well as files and directories matching exclude
+    patterns or .vw2htmlignore files, the same way as when scanning the wiki.
+    """
+    # Time to wait for the subsequent events after the first one appears.
+    # Editors tend to write files in several steps (write to temporary file,
+    # rename, change attributes), so it's better to gather them together.
+    delay = 0.05
+
+    def __init__(self, path, exclude=None, patterns=None):
+        self.path = os.path.abspath(path)
+        self.exclude = [os.path.abspath(x) for x in exclude or []]
+        self.patterns = patterns or []
+
+    def _in_exclude(self, path):
+        return any(path == x or path.startswith(x + os.sep)
+                   for x in self.exclude)
+
+    def _is_excluded(self, path):
+        return (self._in_exclude(path) or
+                scan.is_excluded(self.path, path, self.patterns))
+
+    def _walk(self, path):
+        """
+        Walk the directory tree like os.walk does, skipping excluded
+        directories. Patterns are compiled and .vw2htmlignore files are read
+        once for the whole walk, and passed down to the subdirectories.
+        """
+        relpath = os.path.relpath(path, self.path)
+        relpath = '' if relpath == os.curdir else relpath.replace(os.sep, '/')
+        patterns = {path: (relpath, scan.read_patterns(self.path, path,
+                                                       self.patterns))}
+        for root, dirs, files in os.walk(path):
+            relpath, dir_patterns = patterns.pop(root)
+            if scan.IGNORE_FNAME in files:
+                dir_patterns = dir_patterns + scan.read_ignore_file(
+                    os.path.join(root, scan.IGNORE_FNAME), relpath)
+            subdirs = []
+            for name in dirs:
+                dirpath = os.path.join(root, name)
+                dir_relpath = f'{relpath}/{name}' if relpath else name
+                if (self._in_exclude(dirpath) or
+                        any(x.match(dir_relpath, name, is_dir=True)
+                            for x in dir_patterns)):
+                    continue
+                subdirs.append(name)
+                patterns[dirpath] = (dir_relpath, dir_patterns)
+            dirs[:] = subdirs
+            yield root, files
+
+    def wait(self):
+        """
+        Block until there are any changes in the watched tree, and return set
+        of the absolute paths to changed files. None means changes cannot be
+        determined, and whole tree should be rescanned.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PollingWatcher(Watcher):
+    """
+    Detect changes by comparing size and modification time of all the files
+    in the tree every interval seconds.
+    """
+    interval = 0.5
+
+    def __init__(self, path, exclude=None, patterns=None):
+        super().__init__(path, exclude, patterns)
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root, files in self._walk(self.path):
+            for fname in files:
+                path = os.path.join(root, fname)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self):
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {path for path, stat in snapshot.items()
+                       if self._snapshot.get(path) != stat}
+            changed.update(set(self._snapshot) - set(snapshot))
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify based watcher. As inotify doesn't support recursive
+    watches, every directory in the tree gets its own watch descriptor.
+    """
+
+    def __init__(self, path, exclude=None, patterns=None):
+        super().__init__(path, exclude, patterns)
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32]
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._wds = {}
+        try:
+            self._watch_tree(self.path)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _watch_tree(self, path):
+        """
+        Add watches for the directory and all its subdirectories. Return set
+        of the files found in there, since those might be created before
+        watch was added.
+        """
+        files = set()
+        for root, fnames in self._walk(path):
+            wd = self._add_watch(self._fd, os.fsencode(root), IN_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), root)
+            self._wds[wd] = root
+            files.update(os.path.join(root, x) for x in fnames)
+        return files
+
+    def _read_events(self, timeout):
+        changed = set()
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return changed
+
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                LOG.warning("Inotify event queue overflowed")
+                return None
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            if wd not in self._wds:
+                continue
+
+            path = os.path.join(self._wds[wd], os.fsdecode(name))
+            if self._is_excluded(path):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changed.update(self._watch_tree(path))
+                    except OSError as exc:
+                        LOG.warning("Cannot watch `%s': %s", path,
+                                    exc.strerror)
+                continue
+            changed.add(path)
+        return changed
+
+    def wait(self):
+        changed = set()
+        while not changed:
+            changed = self._read_events(None)
+            if changed is None:
+                return None
+
+        while True:
+            more = self._read_events(self.delay)
+            if more is None:
+                return None
+            if not more:
+                break
+            changed.update(more)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def get_watcher(path, exclude=None, patterns=None):
+    """
+    Return inotify watcher if possible, polling one otherwise.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path, exclude, patterns)
+        except (OSError, AttributeError, TypeError) as exc:
+            if isinstance(exc, OSError) and exc.errno == errno.ENOSPC:
+                LOG.warning("Inotify watch limit reached, consider "
+                            "increasing fs.inotify.max_user_watches")
+            LOG.info("Cannot use inotify, falling back to polling: %s", exc)
+    return PollingWatcher(path, exclude, patterns)